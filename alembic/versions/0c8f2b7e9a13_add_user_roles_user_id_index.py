@@ -0,0 +1,29 @@
+"""add user roles user_id index
+
+Revision ID: 0c8f2b7e9a13
+Revises: e5a9d7c31f46
+Create Date: 2026-10-17 16:02:44.117205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c8f2b7e9a13'
+down_revision: Union[str, None] = 'e5a9d7c31f46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the primary key (role_id, user_id) can't serve lookups by user
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_user_roles_user_id_role_id', 'lz_user_roles', ['user_id', 'role_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_user_roles_user_id_role_id', table_name='lz_user_roles', postgresql_concurrently=True, if_exists=True)
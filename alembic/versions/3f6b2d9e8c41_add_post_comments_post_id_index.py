@@ -0,0 +1,29 @@
+"""add post comments post_id index
+
+Revision ID: 3f6b2d9e8c41
+Revises: 88d7917edeb0
+Create Date: 2026-10-17 20:12:37.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2d9e8c41'
+down_revision: Union[str, None] = '88d7917edeb0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # comments of a post in thread order, for keyset pagination
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_post_comments_post_id_created_on_id', 'lz_post_comments', ['post_id', 'created_on', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_post_comments_post_id_created_on_id', table_name='lz_post_comments', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+"""add session indexes
+
+Revision ID: 6379c5e1d90e
+Revises: a5c72fd7fc11
+Create Date: 2026-10-17 11:04:09.671520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6379c5e1d90e'
+down_revision: Union[str, None] = 'a5c72fd7fc11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # lz_sessions is written by every login and refresh, don't block it
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_lz_sessions_created_on'), 'lz_sessions', ['created_on'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_lz_sessions_user_id_created_on', 'lz_sessions', ['user_id', 'created_on'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_sessions_user_id_created_on', table_name='lz_sessions', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_lz_sessions_created_on'), table_name='lz_sessions', postgresql_concurrently=True, if_exists=True)
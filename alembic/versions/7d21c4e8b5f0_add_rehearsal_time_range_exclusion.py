@@ -0,0 +1,40 @@
+"""add rehearsal time range exclusion
+
+Revision ID: 7d21c4e8b5f0
+Revises: 0c8f2b7e9a13
+Create Date: 2026-10-17 17:26:13.840512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7d21c4e8b5f0'
+down_revision: Union[str, None] = '0c8f2b7e9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lz_rehearsals', sa.Column('time_range', postgresql.TSTZRANGE(), nullable=True))
+    op.execute(
+        "UPDATE lz_rehearsals SET time_range = "
+        "tstzrange(start_time, start_time + make_interval(hours => duration))"
+    )
+    op.alter_column('lz_rehearsals', 'time_range', nullable=False)
+    # fails if already booked rehearsals overlap, those have to be
+    # resolved by hand before upgrading
+    op.create_exclude_constraint(
+        'lz_rehearsals_time_range_excl',
+        'lz_rehearsals',
+        ('time_range', '&&'),
+        using='gist',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('lz_rehearsals_time_range_excl', 'lz_rehearsals')
+    op.drop_column('lz_rehearsals', 'time_range')
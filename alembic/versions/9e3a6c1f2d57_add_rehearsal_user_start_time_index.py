@@ -0,0 +1,29 @@
+"""add rehearsal user start_time index
+
+Revision ID: 9e3a6c1f2d57
+Revises: 7d21c4e8b5f0
+Create Date: 2026-10-17 19:41:08.530416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a6c1f2d57'
+down_revision: Union[str, None] = '7d21c4e8b5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a user's upcoming and archived rehearsals, in either direction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_rehearsals_user_id_start_time_id', 'lz_rehearsals', ['user_id', 'start_time', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_rehearsals_user_id_start_time_id', table_name='lz_rehearsals', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+"""add keyset pagination indexes
+
+Revision ID: b41e6f0c2d8a
+Revises: 6379c5e1d90e
+Create Date: 2026-10-17 13:42:51.208337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e6f0c2d8a'
+down_revision: Union[str, None] = '6379c5e1d90e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently so that the feed stays writable meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_posts_created_on_id', 'lz_posts', ['created_on', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_lz_rehearsals_start_time_id', 'lz_rehearsals', ['start_time', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_rehearsals_start_time_id', table_name='lz_rehearsals', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_lz_posts_created_on_id', table_name='lz_posts', postgresql_concurrently=True, if_exists=True)
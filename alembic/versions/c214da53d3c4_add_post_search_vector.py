@@ -0,0 +1,31 @@
+"""add post search vector
+
+Revision ID: c214da53d3c4
+Revises: 3f6b2d9e8c41
+Create Date: 2026-10-17 19:35:31.012453
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c214da53d3c4'
+down_revision: Union[str, None] = '3f6b2d9e8c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # stored generated column, filled for existing posts by a table rewrite
+    op.add_column('lz_posts', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('russian', title), 'A') || setweight(to_tsvector('russian', text), 'B')", persisted=True), nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_posts_search_vector', 'lz_posts', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_posts_search_vector', table_name='lz_posts', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('lz_posts', 'search_vector')
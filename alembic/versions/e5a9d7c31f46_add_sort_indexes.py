@@ -0,0 +1,34 @@
+"""add sort indexes
+
+Revision ID: e5a9d7c31f46
+Revises: b41e6f0c2d8a
+Create Date: 2026-10-17 15:18:27.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9d7c31f46'
+down_revision: Union[str, None] = 'b41e6f0c2d8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lz_users_created_on_id', 'lz_users', ['created_on', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_lz_users_full_name_id', 'lz_users', ['full_name', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_lz_roles_name_id', 'lz_roles', ['name', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_lz_posts_likes_id', 'lz_posts', ['likes', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lz_posts_likes_id', table_name='lz_posts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_lz_roles_name_id', table_name='lz_roles', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_lz_users_full_name_id', table_name='lz_users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_lz_users_created_on_id', table_name='lz_users', postgresql_concurrently=True, if_exists=True)
@@ -2,29 +2,54 @@ from typing import Annotated
 
 from app import models
 from app.api.dependencies.core import DBSessionDep
-from app.crud.user import get_user_by_username, get_user_permissions
-from app.schemas.auth import TokenData
+from app.crud.user import (
+    get_feed_token_version,
+    get_permissions_version,
+    get_principal,
+    get_user_by_username,
+)
+from app.schemas.auth import Principal, TokenData
 from app.utils.auth import decode_jwt, oauth2_scheme
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from jose import JWTError
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db_session: DBSessionDep
-) -> models.User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+async def get_token_data(
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> TokenData:
+    # async so that it runs on the event loop, not in the threadpool
     try:
         payload = decode_jwt(token)
         username = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        # tokens issued before the "type" claim are access tokens
+        if payload.get("type", "access") != "access":
+            raise credentials_exception
+        return TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            is_superadmin=payload.get("su", False),
+            permissions=payload.get("perms", []),
+            permissions_version=payload.get("pv"),
+        )
     except JWTError:
         raise credentials_exception
+
+
+TokenDataDep = Annotated[TokenData, Depends(get_token_data)]
+
+
+async def get_current_user(
+    token_data: TokenDataDep, db_session: DBSessionDep
+) -> models.User:
     user = await get_user_by_username(db_session, token_data.username)
     if user is None:
         raise credentials_exception
@@ -34,14 +59,63 @@ async def get_current_user(
 CurrentUserDep = Annotated[models.User, Depends(get_current_user)]
 
 
+async def get_current_principal(
+    token_data: TokenDataDep, db_session: DBSessionDep
+) -> Principal:
+    if token_data.permissions_version is not None:
+        permissions_version = await get_permissions_version(
+            db_session, token_data.user_id
+        )
+        if permissions_version == token_data.permissions_version:
+            return Principal(
+                id=token_data.user_id,
+                username=token_data.username,
+                is_superadmin=token_data.is_superadmin,
+                permissions=token_data.permissions,
+                permissions_version=permissions_version,
+            )
+    # token without claims or with outdated ones
+    principal = await get_principal(db_session, token_data.username)
+    if principal is None:
+        raise credentials_exception
+    return principal
+
+
+CurrentPrincipalDep = Annotated[Principal, Depends(get_current_principal)]
+
+
+async def get_feed_token_data(
+    token: Annotated[str, Query()], db_session: DBSessionDep
+) -> TokenData:
+    """
+    Calendar apps can't send headers, so .ics feeds take a long-lived
+    token of type "feed" in the query string.
+    """
+    try:
+        payload = decode_jwt(token)
+    except JWTError:
+        raise credentials_exception
+    if payload.get("type") != "feed" or payload.get("uid") is None:
+        raise credentials_exception
+    # the user may have been deleted, or changed the password, since
+    feed_token_version = await get_feed_token_version(
+        db_session, payload["uid"]
+    )
+    if feed_token_version is None or feed_token_version != payload.get("fv"):
+        raise credentials_exception
+    return TokenData(username=payload.get("sub"), user_id=payload["uid"])
+
+
+FeedTokenDataDep = Annotated[TokenData, Depends(get_feed_token_data)]
+
+
 class UserHasPermission:
     def __init__(self, permission: str):
         self.permission = permission
 
-    def __call__(self, current_user: CurrentUserDep) -> bool:
+    def __call__(self, current_user: CurrentPrincipalDep) -> bool:
         if current_user.is_superadmin:
             return True
-        user_permissions = get_user_permissions(current_user)
-        if self.permission in user_permissions:
+        if self.permission in current_user.permissions:
             return True
         raise HTTPException(status_code=403, detail="Not enough permissions")
@@ -4,7 +4,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.schemas.user import UserLogin
 from app.schemas.auth import Token, TokenPair, RefreshToken
 from app.api.dependencies.core import DBSessionDep
-from app.crud.user import authenticate_user
+from app.crud.user import (
+    authenticate_user,
+    get_principal,
+    principal_from_user,
+)
 from app.crud import session
 from app.utils.auth import create_token
 
@@ -25,7 +29,11 @@ async def token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_token(data={"sub": user.username}, type="access")
+    access_token = create_token(
+        data={"sub": user.username},
+        type="access",
+        principal=principal_from_user(user),
+    )
     return Token(access_token=access_token, token_type="bearer")
 
 
@@ -42,7 +50,11 @@ async def login(login_data: UserLogin, db_session: DBSessionDep) -> TokenPair:
         )
     user_session = await session.create_user_session(db_session, user)
     await db_session.commit()
-    access_token = create_token(data={"sub": user.username}, type="access")
+    access_token = create_token(
+        data={"sub": user.username},
+        type="access",
+        principal=principal_from_user(user),
+    )
     refresh_token = create_token(
         data={"sub": str(user_session.uuid)}, type="refresh"
     )
@@ -73,8 +85,9 @@ async def update_refresh_token(
     if not new_session:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     await db_session.commit()
+    principal = await get_principal(db_session, new_session.username)
     access_token = create_token(
-        data={"sub": new_session.user.username}, type="access"
+        data={"sub": principal.username}, type="access", principal=principal
     )
     refresh_token = create_token(
         data={"sub": str(new_session.uuid)}, type="refresh"
@@ -1,43 +1,83 @@
 from fastapi import APIRouter, Query, Response
-from app.crud.post import dislike_post, get_post, get_posts_multi, like_post
-from app.schemas.post import PostComment, PostCommentCreate, PostRead, PostReadSimple
+from app.crud.post import (
+    dislike_post,
+    get_post_comment,
+    get_post_comments,
+    get_post_detail,
+    get_posts_multi,
+    like_post,
+    post_comment,
+    search_posts,
+)
+from app.schemas.post import (
+    PostComment,
+    PostCommentCreate,
+    PostRead,
+    PostReadSimple,
+    PostSearchHit,
+)
 from app.api.dependencies.core import DBSessionDep
-from app.api.dependencies.user import CurrentUserDep
+from app.api.dependencies.user import CurrentPrincipalDep
 from typing import Annotated
 from typing import List
+from app.crud.counting import CountMode
+from app.utils.responses import page_response
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
 
 @router.get("")
 async def get_all_posts(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     db_session: DBSessionDep,
     response: Response,
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
     order_list: str | None = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[PostReadSimple]:
-    users, count = await get_posts_multi(
-        db_session, limit, offset, order_list
+    page = await get_posts_multi(
+        db_session,
+        limit,
+        offset,
+        order_list,
+        cursor=cursor,
+        count_mode=count_mode,
+        as_json=settings.FAST_LIST_RESPONSES,
+    )
+    return page_response(response, page)
+
+@router.get("/search")
+async def search_all_posts(
+    current_user: CurrentPrincipalDep,
+    db_session: DBSessionDep,
+    response: Response,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
+) -> List[PostSearchHit]:
+    page = await search_posts(
+        db_session, q, limit, cursor=cursor, count_mode=count_mode
     )
-    response.headers["X-Total-Count"] = str(count)
-    return users
+    return page_response(response, page)
 
 @router.get("/{post_id}")
 async def get_post_by_id(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     post_id: int,
     db_session: DBSessionDep,
 ) -> PostRead:
-    post = await get_post(
-        db_session, post_id
-    )
+    post = await get_post_detail(db_session, post_id)
     return post
 
 @router.patch("/{post_id}/like")
 async def put_like_on_post(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     post_id: int,
     db_session: DBSessionDep,
 ) -> int:
@@ -49,7 +89,7 @@ async def put_like_on_post(
 
 @router.patch("/{post_id}/dislike")
 async def put_dislike_on_post(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     post_id: int,
     db_session: DBSessionDep,
 ) -> int:
@@ -59,15 +99,38 @@ async def put_dislike_on_post(
     await db_session.commit()
     return dislikes
 
-# @router.post("/{post_id}/comment")
-# async def write_comment_to_post(
-#     current_user: CurrentUserDep,
-#     post_id: int,
-#     comment: PostCommentCreate,
-#     db_session: DBSessionDep,
-# ) -> PostComment:
-#     likes = await post_comment(
-#         db_session, post_id, current_user.id
-#     )
-#     await db_session.commit()
-#     return likes
\ No newline at end of file
+@router.get("/{post_id}/comments")
+async def get_comments_of_post(
+    current_user: CurrentPrincipalDep,
+    post_id: int,
+    db_session: DBSessionDep,
+    response: Response,
+    limit: Annotated[int | None, Query(ge=0)] = None,
+    offset: Annotated[int | None, Query(ge=0)] = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
+) -> List[PostComment]:
+    page = await get_post_comments(
+        db_session,
+        post_id,
+        limit,
+        offset,
+        cursor=cursor,
+        count_mode=count_mode,
+        as_json=settings.FAST_LIST_RESPONSES,
+    )
+    return page_response(response, page)
+
+@router.post("/{post_id}/comments")
+async def write_comment_to_post(
+    current_user: CurrentPrincipalDep,
+    post_id: int,
+    comment: PostCommentCreate,
+    db_session: DBSessionDep,
+) -> PostComment:
+    new_comment = await post_comment(
+        db_session, post_id, comment, current_user.id
+    )
+    await db_session.commit()
+    new_comment = await get_post_comment(db_session, new_comment.id)
+    return new_comment
\ No newline at end of file
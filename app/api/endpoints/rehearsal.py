@@ -1,55 +1,151 @@
-from datetime import datetime
-from fastapi import APIRouter, Query, HTTPException, Depends, Response
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
 from typing import Annotated, List
-from app.schemas.rehearsal import RehearsalRead, RehearsalCreate
+from app.schemas.rehearsal import (
+    FreeInterval,
+    RehearsalRead,
+    RehearsalCreate,
+    RehearsalSeriesCreate,
+)
 from app.api.dependencies.core import DBSessionDep
-from app.api.dependencies.user import CurrentUserDep, UserHasPermission
+from app.api.dependencies.user import (
+    CurrentPrincipalDep,
+    FeedTokenDataDep,
+    UserHasPermission,
+)
 from app.crud.rehearsal import (
     get_rehearsals_multi,
     get_rehearsal,
     create_rehearsal,
+    create_rehearsal_series,
+    get_free_intervals,
  #   update_rehearsal,
     delete_rehearsal,
 )
+from app.crud.calendar import calendar_cacheable, get_calendar
+from app.crud.counting import CountMode
+from app.utils.ical import rehearsal_feed_response
+from app.utils.responses import page_response
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
 
+def _as_utc(moment: datetime | None) -> datetime | None:
+    # naive datetimes are taken as UTC
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
 @router.get("")
 async def get_all_rehearsals(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     response: Response,
     #_: Annotated[bool, Depends(UserHasPermission("rehearsal_read"))],
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
     filter_from: datetime | None = None,
-    filter_to: datetime | None = None
+    filter_to: datetime | None = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[RehearsalRead]:
-    rehearsals, count = await get_rehearsals_multi(
-        db_session, limit, offset, filter_from, filter_to
+    filter_from, filter_to = _as_utc(filter_from), _as_utc(filter_to)
+    if (
+        limit is None
+        and not offset
+        and cursor is None
+        and calendar_cacheable(filter_from, filter_to)
+    ):
+        page = await get_calendar(
+            db_session, filter_from, filter_to, count_mode
+        )
+        return page_response(response, page)
+    page = await get_rehearsals_multi(
+        db_session,
+        limit,
+        offset,
+        filter_from,
+        filter_to,
+        cursor=cursor,
+        count_mode=count_mode,
+        as_json=settings.FAST_LIST_RESPONSES,
     )
-    response.headers["X-Total-Count"] = str(count)
-    return rehearsals
+    return page_response(response, page)
 
 
 @router.post("")
 async def add_rehearsal(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     new_rehearsal: RehearsalCreate,
     #_: Annotated[bool, Depends(UserHasPermission("rehearsal_update"))],
 ) -> RehearsalRead:
-    rehearsal = await create_rehearsal(db_session, new_rehearsal, current_user)
+    rehearsal = await create_rehearsal(
+        db_session, new_rehearsal, current_user.id
+    )
     await db_session.commit()
-    await db_session.refresh(rehearsal)
     return rehearsal
 
 
+@router.post("/series")
+async def add_rehearsal_series(
+    db_session: DBSessionDep,
+    current_user: CurrentPrincipalDep,
+    new_series: RehearsalSeriesCreate,
+    #_: Annotated[bool, Depends(UserHasPermission("rehearsal_update"))],
+) -> List[RehearsalRead]:
+    rehearsals = await create_rehearsal_series(
+        db_session, new_series, current_user.id
+    )
+    await db_session.commit()
+    return rehearsals
+
+
+@router.get("/availability")
+async def get_availability(
+    db_session: DBSessionDep,
+    current_user: CurrentPrincipalDep,
+    filter_from: datetime,
+    filter_to: datetime,
+    granularity: Annotated[int, Query(ge=5, le=24 * 60)] = 60,
+) -> List[FreeInterval]:
+    """Free time in [filter_from, filter_to), granularity in minutes."""
+    filter_from, filter_to = _as_utc(filter_from), _as_utc(filter_to)
+    if filter_to <= filter_from:
+        raise HTTPException(
+            status_code=422, detail="filter_to must be after filter_from"
+        )
+    if filter_to - filter_from > timedelta(days=settings.AVAILABILITY_MAX_DAYS):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range is limited to {settings.AVAILABILITY_MAX_DAYS} days",
+        )
+    intervals = await get_free_intervals(
+        db_session, filter_from, filter_to, timedelta(minutes=granularity)
+    )
+    return [
+        FreeInterval(start_time=start, end_time=end)
+        for start, end in intervals
+    ]
+
+
+@router.get("/calendar.ics", response_class=Response)
+async def get_rehearsals_feed(
+    db_session: DBSessionDep,
+    feed_user: FeedTokenDataDep,
+    request: Request,
+):
+    return await rehearsal_feed_response(request, db_session, "Репетиции")
+
+
 @router.get("/{rehearsal_id}")
 async def get_rehearsal_info(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     rehearsal_id: int,
     #_: Annotated[bool, Depends(UserHasPermission("rehearsal_read"))],
 ) -> RehearsalRead:
@@ -60,7 +156,7 @@ async def get_rehearsal_info(
 # @router.patch("/{rehearsal_id}")
 # async def edit_rehearsal_info(
 #     db_session: DBSessionDep,
-#     current_user: CurrentUserDep,
+#     current_user: CurrentPrincipalDep,
 #     rehearsal_id: int,
 #     patch_fields: RehearsalUpdate,
 #     #_: Annotated[bool, Depends(UserHasPermission("rehearsal_update"))],
@@ -77,7 +173,7 @@ async def get_rehearsal_info(
 @router.delete("/{rehearsal_id}")
 async def remove_rehearsal(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     rehearsal_id: int,
     #_: Annotated[bool, Depends(UserHasPermission("rehearsal_update"))],
 ) -> None:
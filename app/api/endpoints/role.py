@@ -3,7 +3,7 @@ from typing import Annotated, List
 from app.schemas.role import RoleRead, RoleCreate, RoleUpdate
 from app.schemas.permission import Permission
 from app.api.dependencies.core import DBSessionDep
-from app.api.dependencies.user import CurrentUserDep, UserHasPermission
+from app.api.dependencies.user import CurrentPrincipalDep, UserHasPermission
 from app.crud.role import (
     get_roles_multi,
     get_role,
@@ -14,6 +14,11 @@ from app.crud.role import (
     delete_permissions,
     get_permissions,
 )
+from app.crud.counting import CountMode
+from app.utils.responses import page_response
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -21,41 +26,48 @@ router = APIRouter()
 @router.get("")
 async def get_all_roles(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     response: Response,
     _: Annotated[bool, Depends(UserHasPermission("role_read"))],
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
     order_list: str | None = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[RoleRead]:
-    roles, count = await get_roles_multi(
-        db_session, limit, offset, order_list
+    page = await get_roles_multi(
+        db_session,
+        limit,
+        offset,
+        order_list,
+        cursor=cursor,
+        count_mode=count_mode,
+        as_json=settings.FAST_LIST_RESPONSES,
     )
-    response.headers["X-Total-Count"] = str(count)
-    return roles
+    return page_response(response, page)
 
 
 @router.post("")
 async def add_role(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     new_role: RoleCreate,
     _: Annotated[bool, Depends(UserHasPermission("role_update"))],
 ) -> RoleRead:
     role = await create_role(db_session, new_role)
     await db_session.commit()
-    await db_session.refresh(role)
+    role = await get_role(db_session, role.id, profile="role_read")
     return role
 
 
 @router.get("/{role_id}")
 async def get_role_info(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     _: Annotated[bool, Depends(UserHasPermission("role_read"))],
 ) -> RoleRead:
-    role = await get_role(db_session, role_id)
+    role = await get_role(db_session, role_id, profile="role_read")
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
     return role
@@ -64,7 +76,7 @@ async def get_role_info(
 @router.patch("/{role_id}")
 async def edit_role_info(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     patch_fields: RoleUpdate,
     _: Annotated[bool, Depends(UserHasPermission("role_update"))],
@@ -75,13 +87,14 @@ async def edit_role_info(
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
     await db_session.commit()
+    role = await get_role(db_session, role_id, profile="role_read")
     return role
 
 
 @router.delete("/{role_id}")
 async def remove_role(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     _: Annotated[bool, Depends(UserHasPermission("role_update"))],
 ) -> None:
@@ -96,7 +109,7 @@ async def remove_role(
 @router.post("/{role_id}/permissions")
 async def assign_permissions_to_role(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     permission_list: Annotated[List[str], Query()],
     _: Annotated[bool, Depends(UserHasPermission("role_update"))],
@@ -116,7 +129,7 @@ async def assign_permissions_to_role(
 @router.delete("/{role_id}/permissions")
 async def unassign_permissions_from_role(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     permission_list: Annotated[List[str], Query()],
     _: Annotated[bool, Depends(UserHasPermission("role_update"))],
@@ -134,7 +147,7 @@ async def unassign_permissions_from_role(
 @router.get("/{role_id}/permissions")
 async def get_permissions_in_role(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     role_id: int,
     _: Annotated[bool, Depends(UserHasPermission("role_read"))],
 ) -> list[Permission]:
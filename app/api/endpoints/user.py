@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from app.crud.rehearsal import get_user_rehearsals
 from app.schemas.rehearsal import RehearsalRead
 from app.schemas.user import UserUpdatePassword, UserUpdate
 from app.schemas.user import UserRead, UserCreate, UserResetPassword
 from app.schemas.role import Role
+from app.schemas.auth import FeedToken
 from app.api.dependencies.core import DBSessionDep
-from app.api.dependencies.user import CurrentUserDep, UserHasPermission
+from app.api.dependencies.user import (
+    CurrentPrincipalDep,
+    CurrentUserDep,
+    FeedTokenDataDep,
+    UserHasPermission,
+)
 from app.crud.user import (
     update_user,
     update_user_password,
@@ -14,6 +20,8 @@ from app.crud.user import (
     get_user_by_username,
     get_user,
     get_users_multi,
+    get_user_roles,
+    get_feed_token_version,
     assign_roles,
     reset_user_password,
     delete_roles,
@@ -21,6 +29,13 @@ from app.crud.user import (
 )
 from typing import Annotated
 from typing import List
+from app.crud.counting import CountMode
+from app.utils.auth import create_token
+from app.utils.ical import rehearsal_feed_response
+from app.utils.responses import page_response
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -33,7 +48,7 @@ async def get_user_info_me(current_user: CurrentUserDep) -> UserRead:
 @router.put("/me/password")
 async def change_password_me(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     password_form: UserUpdatePassword,
 ) -> UserRead:
     if current_user.is_superadmin:
@@ -48,26 +63,26 @@ async def change_password_me(
 @router.patch("/me")
 async def edit_user_me(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     new_fields: UserUpdate,
 ) -> UserRead:
-    await update_user(
+    patched_user = await update_user(
         db_session, current_user.id, new_fields
     )
     await db_session.commit()
-    return current_user
+    return patched_user
 
 
 @router.post("")
 async def add_new_user(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     db_session: DBSessionDep,
     user_data: UserCreate,
 ) -> UserRead:
     if not current_user.is_superadmin:
         raise HTTPException(status_code=403, detail="Not an admin")
     db_user = await get_user_by_username(
-        db_session, username=user_data.username
+        db_session, username=user_data.username, profile=None
     )
     if db_user is not None:
         raise HTTPException(
@@ -78,41 +93,48 @@ async def add_new_user(
         db_session, user_data
     )
     await db_session.commit()
-    await db_session.refresh(new_user)
+    new_user = await get_user(db_session, new_user.id)
     return new_user
 
 
 @router.get("")
 async def get_all_users(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     db_session: DBSessionDep,
     _: Annotated[bool, Depends(UserHasPermission("user_read"))],
     response: Response,
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
     order_list: str | None = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[UserRead]:
-    users, count = await get_users_multi(
-        db_session, limit, offset, order_list
+    page = await get_users_multi(
+        db_session,
+        limit,
+        offset,
+        order_list,
+        cursor=cursor,
+        count_mode=count_mode,
+        as_json=settings.FAST_LIST_RESPONSES,
     )
-    response.headers["X-Total-Count"] = str(count)
-    return users
+    return page_response(response, page)
 
 
 @router.get("/{user_id}")
 async def get_user_info_by_id(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     user_id: int,
     _: Annotated[bool, Depends(UserHasPermission("user_read"))],
 ) -> UserRead:
-    result = await get_user(db_session, user_id)
+    result = await get_user(db_session, user_id, profile="user_view")
     return result
 
 
 @router.delete("/{user_id}")
 async def remove_user(
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     db_session: DBSessionDep,
     user_id: int,
     _: Annotated[bool, Depends(UserHasPermission("user_update"))],
@@ -127,7 +149,7 @@ async def remove_user(
 @router.patch("/{user_id}")
 async def edit_user(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     user_id: int,
     new_fields: UserUpdate,
     _: Annotated[bool, Depends(UserHasPermission("user_update"))],
@@ -142,7 +164,7 @@ async def edit_user(
 @router.put("/{user_id}/password")
 async def change_password_for_user(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     user_id: int,
     password: UserResetPassword,
     _: Annotated[bool, Depends(UserHasPermission("user_update"))],
@@ -159,7 +181,7 @@ async def change_password_for_user(
 @router.post("/{user_id}/roles")
 async def assign_roles_to_user(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     user_id: int,
     role_list: Annotated[List[str], Query()],
     _: Annotated[bool, Depends(UserHasPermission("user_update"))],
@@ -174,7 +196,7 @@ async def assign_roles_to_user(
 @router.delete("/{user_id}/roles")
 async def unassign_roles_from_user(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     user_id: int,
     role_list: Annotated[List[str], Query()],
     _: Annotated[bool, Depends(UserHasPermission("user_update"))],
@@ -193,30 +215,75 @@ async def unassign_roles_from_user(
 async def get_all_user_roles(
     db_session: DBSessionDep,
     user_id: int,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     _: Annotated[bool, Depends(UserHasPermission("user_read"))],
+    response: Response,
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
+    order_list: str | None = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[Role]:
-    try:
-        end = limit + offset
-    except TypeError:
-        end = limit
-    user = await get_user(db_session, user_id)
-    return user.user_roles[offset:end]
+    page = await get_user_roles(
+        db_session,
+        user_id,
+        limit,
+        offset,
+        order_list,
+        cursor,
+        count_mode,
+    )
+    return page_response(response, page)
 
 
 @router.get("/me/rehearsals")
 async def get_rehearsals_my(
     db_session: DBSessionDep,
-    current_user: CurrentUserDep,
+    current_user: CurrentPrincipalDep,
     archive: bool,
     response: Response,
     limit: Annotated[int | None, Query(ge=0)] = None,
     offset: Annotated[int | None, Query(ge=0)] = None,
+    cursor: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = "auto",
 ) -> List[RehearsalRead]:
-    rehearsals, count = await get_user_rehearsals(
-        db_session, current_user.id, archive, limit, offset, 
+    page = await get_user_rehearsals(
+        db_session,
+        current_user.id,
+        archive,
+        limit,
+        offset,
+        cursor,
+        count_mode,
+    )
+    return page_response(response, page)
+
+
+@router.post("/me/feed-token")
+async def create_feed_token(
+    db_session: DBSessionDep, current_user: CurrentPrincipalDep
+) -> FeedToken:
+    """
+    Token for the `token` parameter of the .ics feeds, valid until
+    the password is changed or reset.
+    """
+    feed_token = create_token(
+        data={
+            "sub": current_user.username,
+            "uid": current_user.id,
+            "fv": await get_feed_token_version(db_session, current_user.id),
+        },
+        type="feed",
+    )
+    return FeedToken(feed_token=feed_token)
+
+
+@router.get("/me/rehearsals.ics", response_class=Response)
+async def get_rehearsals_feed_my(
+    db_session: DBSessionDep,
+    feed_user: FeedTokenDataDep,
+    request: Request,
+):
+    return await rehearsal_feed_response(
+        request, db_session, "Мои репетиции", feed_user.user_id
     )
-    response.headers["X-Total-Count"] = str(count)
-    return rehearsals
@@ -1,6 +1,7 @@
-from pydantic import computed_field
+from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -24,6 +25,51 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRES_IN: int
     ACCESS_TOKEN_EXPIRES_IN: int
 
+    # seconds a resolved principal may be served from memory
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    # seconds a user's permissions version may be served from memory
+    PERMISSIONS_VERSION_CACHE_TTL: int = 15
+    # verified token payloads kept until the token expires
+    JWT_CACHE_SIZE: int = 4096
+
+    # expired sessions are deleted every SESSION_SWEEP_INTERVAL seconds
+    SESSION_SWEEP_INTERVAL: int = 600
+    SESSION_SWEEP_BATCH_SIZE: int = 1000
+    MAX_SESSIONS_PER_USER: int = Field(default=10, ge=1)
+
+    # bcrypt runs in this pool so it never blocks the event loop
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_CONCURRENCY: int = 8
+
+    # list endpoints serialize Core rows straight to JSON, no ORM objects
+    FAST_LIST_RESPONSES: bool = False
+
+    # unfiltered listings of tables smaller than this are counted
+    # exactly; statistics of small tables are rarely up to date
+    ESTIMATED_COUNT_MIN_ROWS: int = 10_000
+
+    # longest range /rehearsals/availability computes free time for
+    AVAILABILITY_MAX_DAYS: int = 31
+
+    # serialized rehearsals per ISO week, dropped on booking changes;
+    # the TTL bounds staleness across workers
+    CALENDAR_CACHE_SIZE: int = 64
+    CALENDAR_CACHE_TTL: int = 300
+    # seconds between log lines with the cache hit/miss counters
+    CACHE_STATS_INTERVAL: int = 300
+
+    # comments embedded in GET /posts/{id}
+    POST_COMMENTS_PAGE_SIZE: int = 20
+
+    # seconds between batched writes of buffered like/dislike counts
+    REACTION_FLUSH_INTERVAL: float = 0.5
+
+    # .ics feeds: token lifetime in minutes, and how far back they go
+    FEED_TOKEN_EXPIRES_IN: int = 60 * 24 * 365
+    CALENDAR_FEED_PAST_DAYS: int = 90
+
     FRONTEND_ORIGIN: str
 
 
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.crud.counting import CountMode
+from app.crud.pagination import Page
+from app.crud.rows import dump_row, fetch_rows
+from app.models import Rehearsal as RehearsalDBModel
+from app.schemas.rehearsal import RehearsalRead
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+# Rehearsal listings by week: (ISO year, ISO week) of start_time in UTC
+# -> [(start_time, serialized RehearsalRead)], in calendar order.
+calendar_cache = TTLCache(
+    maxsize=settings.CALENDAR_CACHE_SIZE, ttl=settings.CALENDAR_CACHE_TTL
+)
+# bumped on every invalidation, so that a snapshot read before a
+# booking was committed is not stored after it
+_generations: dict[tuple[int, int], int] = {}
+
+# longer ranges go to the database directly
+MAX_CACHED_WEEKS = 6
+
+_PENDING_BUCKETS = "calendar_buckets"
+
+
+def week_bucket(moment: datetime) -> tuple[int, int]:
+    year, week, _ = moment.astimezone(timezone.utc).isocalendar()
+    return year, week
+
+
+def _week_start(bucket: tuple[int, int]) -> datetime:
+    return datetime.fromisocalendar(*bucket, 1).replace(tzinfo=timezone.utc)
+
+
+def _week_buckets(range_from: datetime, range_to: datetime):
+    bucket = week_bucket(range_from)
+    last = week_bucket(range_to)
+    while bucket <= last:
+        yield bucket
+        bucket = week_bucket(_week_start(bucket) + timedelta(weeks=1))
+
+
+def calendar_cacheable(
+    filter_from: datetime | None, filter_to: datetime | None
+) -> bool:
+    if filter_from is None or filter_to is None or filter_to <= filter_from:
+        return False
+    weeks = len(list(_week_buckets(filter_from, filter_to)))
+    return weeks <= MAX_CACHED_WEEKS
+
+
+async def _week_items(
+    db_session: AsyncSession, bucket: tuple[int, int]
+) -> list[tuple[datetime, bytes]]:
+    items = calendar_cache.get(bucket)
+    if items is not None:
+        return items
+    generation = _generations.get(bucket, 0)
+    week_from = _week_start(bucket)
+    rows = await fetch_rows(
+        db_session,
+        RehearsalDBModel,
+        RehearsalRead,
+        select(RehearsalDBModel)
+        .where(RehearsalDBModel.start_time >= week_from)
+        .where(RehearsalDBModel.start_time < week_from + timedelta(weeks=1))
+        .order_by(RehearsalDBModel.start_time, RehearsalDBModel.id),
+    )
+    items = [(row["start_time"], dump_row(RehearsalRead, row)) for row in rows]
+    if _generations.get(bucket, 0) == generation:
+        calendar_cache.set(bucket, items)
+    return items
+
+
+async def get_calendar(
+    db_session: AsyncSession,
+    filter_from: datetime,
+    filter_to: datetime,
+    count_mode: CountMode = "auto",
+) -> Page:
+    """
+    Same rehearsals as an unpaginated `get_rehearsals_multi`,
+    assembled from cached weeks as JSON bytes.
+    """
+    items = []
+    for bucket in _week_buckets(filter_from, filter_to):
+        items += [
+            item
+            for start_time, item in await _week_items(db_session, bucket)
+            if filter_from < start_time < filter_to
+        ]
+    total = None if count_mode == "none" else len(items)
+    return Page(b"[" + b",".join(items) + b"]", total)
+
+
+def invalidate_calendar(*start_times: datetime):
+    for start_time in start_times:
+        bucket = week_bucket(start_time)
+        _generations[bucket] = _generations.get(bucket, 0) + 1
+        calendar_cache.pop(bucket)
+
+
+def invalidate_calendar_on_commit(
+    db_session: AsyncSession, *start_times: datetime
+):
+    """
+    Drop the weeks of `start_times` once the session commits, so that
+    no request can cache them again from the not yet committed state.
+    """
+    pending = db_session.info.setdefault(_PENDING_BUCKETS, [])
+    pending.extend(start_times)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    invalidate_calendar(*session.info.pop(_PENDING_BUCKETS, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop(_PENDING_BUCKETS, None)
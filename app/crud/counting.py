@@ -0,0 +1,110 @@
+from typing import Literal
+
+from sqlalchemy import Select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from app.config import get_settings
+from app.database import Base
+
+settings = get_settings()
+
+CountMode = Literal["auto", "exact", "estimated", "none"]
+
+TOTAL_COUNT = "_total_count"
+
+
+async def estimated_count(
+    db_session: AsyncSession, model: type[Base]
+) -> int | None:
+    """
+    Row count from planner statistics, None if never analyzed. Like
+    the planner, the density seen by the last ANALYZE is scaled to
+    the current size of the table.
+    """
+    row = (
+        await db_session.execute(
+            text(
+                "SELECT reltuples, relpages, "
+                "pg_relation_size(oid) / current_setting('block_size')::int "
+                "FROM pg_class WHERE oid = to_regclass(:table_name)"
+            ),
+            {"table_name": model.__tablename__},
+        )
+    ).first()
+    if row is None:
+        return None
+    reltuples, relpages, pages = row
+    if reltuples < 0:
+        return None
+    if relpages > 0:
+        return int(reltuples / relpages * pages)
+    return int(reltuples)
+
+
+class TotalCount:
+    """
+    How the total of a listing is computed:
+
+    auto (default): planner statistics for unfiltered listings of
+        large tables, see `resolve`; for filtered ones
+        `count(*) OVER ()` in the first page's query, and no total
+        on cursor pages, the first page already gave it;
+    exact: the window for filtered listings, a separate `count(*)`
+        for unfiltered ones and whenever the page can't tell (empty
+        page, or a cursor page that does not see preceding rows);
+    estimated: planner statistics for unfiltered listings of large
+        tables, exact otherwise;
+    none: no total at all.
+
+    The window is never used on unfiltered listings: it makes the
+    page query read the whole table, joins included, before LIMIT.
+    """
+
+    def __init__(
+        self,
+        mode: CountMode,
+        count_stmt: Select,
+        model: type[Base],
+        filtered: bool = False,
+    ):
+        self.mode = mode
+        self.count_stmt = count_stmt
+        self.model = model
+        self.filtered = filtered
+
+    @property
+    def uses_estimate(self) -> bool:
+        return self.mode in ("auto", "estimated") and not self.filtered
+
+    def window(self, cursor: str | None) -> dict[str, ColumnElement]:
+        if self.mode == "none" or not self.filtered or cursor is not None:
+            return {}
+        return {TOTAL_COUNT: func.count().over()}
+
+    async def resolve(
+        self,
+        db_session: AsyncSession,
+        window_total: int | None,
+        cursor: str | None = None,
+        seen: int = 0,
+    ) -> tuple[int | None, bool]:
+        """
+        Return the total and whether it is an estimate. Estimates
+        below ESTIMATED_COUNT_MIN_ROWS, or below the `seen` rows up to
+        the end of the page, are replaced with an exact count.
+        """
+        if self.mode == "none":
+            return None, False
+        if self.mode == "auto" and self.filtered and cursor is not None:
+            return None, False
+        if self.uses_estimate:
+            estimate = await estimated_count(db_session, self.model)
+            if (
+                estimate is not None
+                and estimate >= settings.ESTIMATED_COUNT_MIN_ROWS
+                and estimate >= seen
+            ):
+                return estimate, True
+        if window_total is not None:
+            return window_total, False
+        return (await db_session.scalars(self.count_stmt)).one(), False
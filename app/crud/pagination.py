@@ -0,0 +1,175 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.orm.interfaces import LoaderOption
+from app.crud.counting import TotalCount
+from app.crud.sorting import SortKey
+
+
+class Page(NamedTuple):
+    items: list | bytes
+    total: int | None
+    next_cursor: str | None = None
+    total_estimated: bool = False
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(key: SortKey, value):
+    if value is not None and key.column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(keys: list[SortKey], values: list) -> str:
+    payload = {
+        "k": [f"{'-' if k.descending else ''}{k.name}" for k in keys],
+        "v": [_encode_value(v) for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(keys: list[SortKey], cursor: str) -> list:
+    invalid_cursor = HTTPException(status_code=422, detail="Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        names, values = payload["k"], payload["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+    # a cursor is only valid for the ordering it was issued for
+    if names != [f"{'-' if k.descending else ''}{k.name}" for k in keys]:
+        raise invalid_cursor
+    if len(values) != len(keys):
+        raise invalid_cursor
+    try:
+        return [_decode_value(k, v) for k, v in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise invalid_cursor
+
+
+def _after(keys: list[SortKey], values: list):
+    """Condition selecting rows that come after `values` in key order."""
+    if len({k.descending for k in keys}) == 1:
+        # row comparison, matches a composite index in either direction
+        row = tuple_(*(k.column for k in keys))
+        bound = tuple_(
+            *(literal(v, k.column.type) for k, v in zip(keys, values))
+        )
+        if keys[0].descending:
+            return row < bound
+        return row > bound
+    conditions = []
+    for i, key in enumerate(keys):
+        equal = [k.column == v for k, v in zip(keys[:i], values[:i])]
+        if key.descending:
+            conditions.append(and_(*equal, key.column < values[i]))
+        else:
+            conditions.append(and_(*equal, key.column > values[i]))
+    return or_(*conditions)
+
+
+class Pagination:
+    """
+    Offset or keyset pagination over a select ordered by `keys`.
+
+    One extra row is fetched past `limit`; when it exists, the last
+    row of the page is encoded into an opaque cursor that continues
+    the listing with `cursor` instead of `offset`.
+    """
+
+    def __init__(
+        self,
+        keys: list[SortKey],
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+    ):
+        if cursor is not None and offset:
+            raise HTTPException(
+                status_code=422,
+                detail="Use either cursor or offset, not both",
+            )
+        if cursor is not None and any(k.nullable for k in keys):
+            raise HTTPException(
+                status_code=422,
+                detail="Cursor pagination is not supported for this order",
+            )
+        self.keys = keys
+        self.limit = limit
+        self.offset = offset
+        self.cursor = cursor
+
+    @property
+    def columns(self) -> dict[str, InstrumentedAttribute]:
+        return {key.name: key.column for key in self.keys}
+
+    def apply(self, select_stmt: Select) -> Select:
+        select_stmt = select_stmt.order_by(*(k.order_by() for k in self.keys))
+        if self.cursor is not None:
+            values = decode_cursor(self.keys, self.cursor)
+            select_stmt = select_stmt.where(_after(self.keys, values))
+        elif self.offset:
+            select_stmt = select_stmt.offset(self.offset)
+        if self.limit is not None:
+            select_stmt = select_stmt.limit(self.limit + 1)
+        return select_stmt
+
+    def page(
+        self,
+        rows: list,
+        get: Callable[[Any, str], Any] | None = None,
+    ) -> tuple[list, str | None]:
+        """
+        Trim the extra row and build the next cursor. `get` reads a
+        sort key from a row, attribute access by default.
+        """
+        if self.limit is None or len(rows) <= self.limit:
+            return rows, None
+        rows = rows[: self.limit]
+        if not rows:
+            # limit=0, no last row to continue from
+            return rows, None
+        if any(k.nullable for k in self.keys):
+            # NULLs have no place in a keyset, offset paging only
+            return rows, None
+        get = get or getattr
+        values = [get(rows[-1], name) for name in self.columns]
+        return rows, encode_cursor(self.keys, values)
+
+
+async def fetch_page(
+    db_session: AsyncSession,
+    select_stmt: Select,
+    pagination: Pagination,
+    total_count: TotalCount,
+    options: tuple[LoaderOption, ...] = (),
+) -> Page:
+    window = total_count.window(pagination.cursor)
+    select_stmt = (
+        pagination.apply(select_stmt)
+        .add_columns(*(c.label(name) for name, c in window.items()))
+        .options(*options)
+    )
+    rows = (await db_session.execute(select_stmt)).all()
+    window_total = rows[0][1] if rows and window else None
+    items, next_cursor = pagination.page([row[0] for row in rows])
+    total, estimated = await total_count.resolve(
+        db_session,
+        window_total,
+        pagination.cursor,
+        seen=(pagination.offset or 0) + len(items),
+    )
+    return Page(items, total, next_cursor, estimated)
@@ -1,10 +1,46 @@
+import html
 from datetime import datetime, timezone
-from app.models import Post as PostDBModel
+from typing import Literal
+from app.models.post import SEARCH_CONFIG
+from app.models import (
+    Post as PostDBModel,
+    PostComment as PostCommentDBModel,
+    PostReaction as PostReactionDBModel,
+)
 from fastapi import HTTPException
-from sqlalchemy import asc, desc, select, func
+from sqlalchemy import delete, select, func
+from sqlalchemy.dialects.postgresql import (
+    REAL,
+    insert,
+    ts_headline,
+    websearch_to_tsquery,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import with_expression
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.post import PostCommentCreate, PostReadSimple
-from app.models import User as UserDBModel
+from app.config import get_settings
+from app.schemas.post import PostCommentCreate, PostRead, PostReadSimple
+from app.crud.counting import TOTAL_COUNT, CountMode, TotalCount
+from app.crud.pagination import Page, Pagination, fetch_page
+from app.crud.sorting import SortKey, compile_order
+from app.crud.profiles import load_profile
+from app.crud.rows import fetch_json
+from app.crud.reactions import (
+    buffer_reaction_on_commit,
+    merge_pending_reactions,
+    reaction_buffer,
+)
+
+settings = get_settings()
+
+# served by ix_lz_post_comments_post_id_created_on_id, so a page of
+# posts costs one index range count per post
+COMMENT_COUNT = (
+    select(func.count())
+    .where(PostCommentDBModel.post_id == PostDBModel.id)
+    .correlate(PostDBModel)
+    .scalar_subquery()
+)
 
 
 async def get_posts_multi(
@@ -12,64 +48,317 @@ async def get_posts_multi(
     limit: int,
     offset: int,
     order_list: str,
-) -> tuple[list[PostReadSimple], int]:
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+    as_json: bool = False,
+) -> Page:
     count_stmt = select(func.count()).select_from(PostDBModel)
-    select_stmt = select(PostDBModel).limit(limit).offset(offset)
-
-    if order_list is not None:
-        direction, sort_label = order_list.split("_", maxsplit=1)
-        if direction == "asc":
-            select_stmt = select_stmt.order_by(asc(sort_label))
-        elif direction == "desc":
-            select_stmt = select_stmt.order_by(desc(sort_label))
-        else:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Unexpectable order prefix {direction}",
-            )
-    else:
-        select_stmt = select_stmt.order_by(desc("created_on"))
+    pagination = Pagination(
+        compile_order(PostDBModel, order_list, default="desc_created_on"),
+        limit,
+        offset,
+        cursor,
+    )
+    total_count = TotalCount(count_mode, count_stmt, PostDBModel)
+    select_stmt = select(PostDBModel)
+    if as_json:
+        return await fetch_json(
+            db_session,
+            "post_list",
+            select_stmt,
+            pagination,
+            total_count,
+            prepare=merge_pending_reactions,
+            expressions={"comment_count": COMMENT_COUNT},
+        )
+    page = await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        (
+            *load_profile("post_list"),
+            with_expression(PostDBModel.comment_count, COMMENT_COUNT),
+        ),
+    )
+    merge_pending_reactions(page.items)
+    return page
+
+
+# ts_headline marks matches with control characters instead of
+# tags, so that the post text can be escaped before they become
+# <b></b>; stray ones in the text yield tags, never markup of its own
+_MATCH_START, _MATCH_STOP = "\x02", "\x03"
 
-    posts = (await db_session.scalars(select_stmt)).all()
-    count = (await db_session.scalars(count_stmt)).one()
-    return posts, count
+
+def _highlight_snippet(snippet: str) -> str:
+    return (
+        html.escape(snippet, quote=False)
+        .replace(_MATCH_START, "<b>")
+        .replace(_MATCH_STOP, "</b>")
+    )
+
+
+async def search_posts(
+    db_session: AsyncSession,
+    q: str,
+    limit: int,
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+) -> Page:
+    """
+    Posts matching web-search syntax `q`, best ranked first. Every
+    matching row is ranked before ORDER BY/LIMIT, so the cost grows
+    with the number of matches; only the snippets, the expensive
+    part, are built for the rows of the page alone.
+    """
+    query = websearch_to_tsquery(SEARCH_CONFIG, q)
+    matches = PostDBModel.search_vector.bool_op("@@")(query)
+    rank = func.ts_rank_cd(PostDBModel.search_vector, query, type_=REAL)
+    pagination = Pagination(
+        [
+            SortKey("rank", rank, descending=True),
+            SortKey("id", PostDBModel.id, descending=True),
+        ],
+        limit,
+        None,
+        cursor,
+    )
+    total_count = TotalCount(
+        count_mode,
+        select(func.count()).select_from(PostDBModel).where(matches),
+        PostDBModel,
+        filtered=True,
+    )
+    window = total_count.window(cursor)
+    hits = (
+        pagination.apply(
+            select(PostDBModel.id, rank.label("rank")).where(matches)
+        )
+        .add_columns(*(c.label(name) for name, c in window.items()))
+        .subquery()
+    )
+    rows = (
+        await db_session.execute(
+            select(
+                PostDBModel.id,
+                PostDBModel.user_id,
+                PostDBModel.title,
+                ts_headline(
+                    SEARCH_CONFIG,
+                    PostDBModel.text,
+                    query,
+                    "MaxFragments=2, MaxWords=30, MinWords=10, "
+                    f'StartSel="{_MATCH_START}", StopSel="{_MATCH_STOP}"',
+                ).label("snippet"),
+                PostDBModel.created_on,
+                hits.c.rank,
+                *(hits.c[name] for name in window),
+            )
+            .join(hits, hits.c.id == PostDBModel.id)
+            .order_by(hits.c.rank.desc(), hits.c.id.desc())
+        )
+    ).mappings().all()
+    window_total = rows[0][TOTAL_COUNT] if rows and window else None
+    rows, next_cursor = pagination.page(rows, lambda row, name: row[name])
+    total, estimated = await total_count.resolve(
+        db_session, window_total, cursor
+    )
+    return Page(
+        [
+            dict(row, snippet=_highlight_snippet(row["snippet"]))
+            for row in rows
+        ],
+        total,
+        next_cursor,
+        estimated,
+    )
 
 
-async def get_post(db_session: AsyncSession, post_id: int):
+async def get_post(
+    db_session: AsyncSession, post_id: int, profile: str | None = "post_detail"
+):
     post = (
         await db_session.scalars(
-            select(PostDBModel).where(
-                PostDBModel.id == post_id
-            )
+            select(PostDBModel)
+            .where(PostDBModel.id == post_id)
+            .options(*load_profile(profile))
         )
     ).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    merge_pending_reactions([post])
     return post
 
-async def like_post(
+Reaction = Literal["like", "dislike"]
+
+REACTION_COUNTERS = {"like": "likes", "dislike": "dislikes"}
+
+
+async def react_to_post(
     db_session: AsyncSession,
     post_id: int,
-    user: UserDBModel
-):
+    user_id: int,
+    reaction: Reaction,
+) -> int:
+    """
+    Record the user's reaction, replacing the opposite one, and
+    return the post's count of `reaction`. Repeating a reaction
+    changes nothing. Counter changes go through the reaction buffer
+    once committed, the post itself is never loaded.
+    """
+    opposite = "dislike" if reaction == "like" else "like"
+    removed = (
+        await db_session.scalars(
+            delete(PostReactionDBModel)
+            .where(
+                PostReactionDBModel.post_id == post_id,
+                PostReactionDBModel.user_id == user_id,
+                PostReactionDBModel.reaction == opposite,
+            )
+            .returning(PostReactionDBModel.reaction)
+        )
+    ).first()
+    try:
+        added = (
+            await db_session.scalars(
+                insert(PostReactionDBModel)
+                .values(post_id=post_id, user_id=user_id, reaction=reaction)
+                .on_conflict_do_nothing()
+                .returning(PostReactionDBModel.reaction)
+            )
+        ).first()
+    except IntegrityError:
+        # foreign key violation, no such post
+        await db_session.rollback()
+        raise HTTPException(status_code=404, detail="Post not found")
+    counter = REACTION_COUNTERS[reaction]
+    stored = (
+        await db_session.scalars(
+            select(getattr(PostDBModel, counter)).where(
+                PostDBModel.id == post_id
+            )
+        )
+    ).one()
+    count = stored + reaction_buffer.delta(post_id)[counter]
+    if added is None:
+        return count
+    deltas = {counter: 1}
+    if removed is not None:
+        deltas[REACTION_COUNTERS[opposite]] = -1
+    buffer_reaction_on_commit(db_session, post_id, deltas)
+    return count + 1
+
+
+async def like_post(db_session: AsyncSession, post_id: int, user_id: int):
+    return await react_to_post(db_session, post_id, user_id, "like")
+
+
+async def dislike_post(db_session: AsyncSession, post_id: int, user_id: int):
+    return await react_to_post(db_session, post_id, user_id, "dislike")
+
+async def get_post_detail(db_session: AsyncSession, post_id: int) -> PostRead:
     post = await get_post(db_session, post_id)
-    post.likes+=1
-    return post.likes
+    comments = await get_post_comments(
+        db_session,
+        post_id,
+        settings.POST_COMMENTS_PAGE_SIZE,
+        None,
+        count_mode="exact",
+    )
+    # comment_count comes with the first page of comments
+    fields = PostReadSimple.model_fields.keys() - {"comment_count"}
+    return PostRead.model_validate(
+        {
+            **{name: getattr(post, name) for name in fields},
+            "comment_count": comments.total,
+            "comments": comments.items,
+            "comments_next_cursor": comments.next_cursor,
+        },
+        from_attributes=True,
+    )
+
 
-async def dislike_post(
+async def get_post_comments(
     db_session: AsyncSession,
     post_id: int,
-    user: UserDBModel
-):
-    post = await get_post(db_session, post_id)
-    post.dislikes+=1
-    return post.dislikes
+    limit: int | None,
+    offset: int | None,
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+    as_json: bool = False,
+) -> Page:
+    """Comments of a post, oldest first."""
+    select_stmt = select(PostCommentDBModel).where(
+        PostCommentDBModel.post_id == post_id
+    )
+    count_stmt = (
+        select(func.count())
+        .select_from(PostCommentDBModel)
+        .where(PostCommentDBModel.post_id == post_id)
+    )
+    pagination = Pagination(
+        compile_order(PostCommentDBModel, None, default="asc_created_on"),
+        limit,
+        offset,
+        cursor,
+    )
+    total_count = TotalCount(
+        count_mode, count_stmt, PostCommentDBModel, filtered=True
+    )
+    if as_json:
+        page = await fetch_json(
+            db_session, "post_comment", select_stmt, pagination, total_count
+        )
+        empty = page.items == b"[]"
+    else:
+        page = await fetch_page(
+            db_session,
+            select_stmt,
+            pagination,
+            total_count,
+            load_profile("post_comment"),
+        )
+        empty = not page.items
+    if empty:
+        # tell an unknown post from one without comments
+        post_exists = (
+            await db_session.scalars(
+                select(PostDBModel.id).where(PostDBModel.id == post_id)
+            )
+        ).first()
+        if post_exists is None:
+            raise HTTPException(status_code=404, detail="Post not found")
+    return page
+
+
+async def get_post_comment(db_session: AsyncSession, comment_id: int):
+    comment = (
+        await db_session.scalars(
+            select(PostCommentDBModel)
+            .where(PostCommentDBModel.id == comment_id)
+            .options(*load_profile("post_comment"))
+        )
+    ).first()
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return comment
+
 
 async def post_comment(
     db_session: AsyncSession,
     post_id: int,
     comment: PostCommentCreate,
-    user: UserDBModel
+    user_id: int,
 ):
-    post = await get_post(db_session, post_id)
-    return post.dislikes
\ No newline at end of file
+    db_comment = PostCommentDBModel(
+        text=comment.text, user_id=user_id, post_id=post_id
+    )
+    db_session.add(db_comment)
+    try:
+        await db_session.flush()
+    except IntegrityError:
+        # foreign key violation, no such post
+        await db_session.rollback()
+        raise HTTPException(status_code=404, detail="Post not found")
+    return db_comment
@@ -0,0 +1,123 @@
+from functools import cache
+from typing import get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from app.database import Base
+from app.models import (
+    Post,
+    PostComment,
+    Rehearsal,
+    Role,
+    User,
+)
+from app.schemas.post import (
+    PostComment as PostCommentView,
+    PostRead,
+    PostReadSimple,
+)
+from app.schemas.rehearsal import RehearsalRead
+from app.schemas.role import Role as RoleView, RoleRead
+from app.schemas.user import UserRead
+
+# Relationships are not loaded unless a query asks for them,
+# so every CRUD function picks one of these named profiles.
+LOAD_PROFILES: dict[str, tuple[LoaderOption, ...]] = {
+    # roles and permissions, enough to resolve a principal
+    "auth": (
+        selectinload(User.user_roles).selectinload(Role.role_permissions),
+    ),
+    "user_read": (
+        selectinload(User.user_roles).selectinload(Role.role_permissions),
+    ),
+    "user_roles": (selectinload(User.user_roles),),
+    "role_permissions": (selectinload(Role.role_permissions),),
+    # everything removed together with the user
+    "user_delete": (
+        selectinload(User.sessions),
+        selectinload(User.blocks),
+        selectinload(User.rehearsals).selectinload(
+            Rehearsal.rehearsal_participants
+        ),
+        selectinload(User.posts).selectinload(Post.post_comments),
+        selectinload(User.comments),
+    ),
+}
+
+# Read-only profiles, derived from the response schema they are
+# serialized into. Columns the schema does not expose stay unloaded,
+# so objects loaded this way must not be modified.
+SCHEMA_PROFILES: dict[str, tuple[type[Base], type[BaseModel]]] = {
+    "user_view": (User, UserRead),
+    "role_read": (Role, RoleRead),
+    "role_view": (Role, RoleView),
+    "post_list": (Post, PostReadSimple),
+    "post_detail": (Post, PostRead),
+    "post_comment": (PostComment, PostCommentView),
+    "rehearsal_read": (Rehearsal, RehearsalRead),
+}
+
+
+def nested_schema(annotation) -> type[BaseModel] | None:
+    """Find pydantic model in `X`, `list[X]`, `X | None` and alike."""
+    if get_origin(annotation) is None:
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation
+        return None
+    for arg in get_args(annotation):
+        schema = nested_schema(arg)
+        if schema is not None:
+            return schema
+    return None
+
+
+def _is_query_expression(prop) -> bool:
+    return dict(prop.strategy_key).get("query_expression", False)
+
+
+def _schema_loader_options(
+    model: type[Base], schema: type[BaseModel]
+) -> list[LoaderOption]:
+    mapper = inspect(model)
+    columns = []
+    options = []
+    for name, field in schema.model_fields.items():
+        if name in mapper.relationships:
+            relationship = mapper.relationships[name]
+            loader = selectinload if relationship.uselist else joinedload
+            option = loader(getattr(model, name))
+            relationship_schema = nested_schema(field.annotation)
+            if relationship_schema is not None:
+                option = option.options(
+                    *_schema_loader_options(
+                        relationship.mapper.class_, relationship_schema
+                    )
+                )
+            options.append(option)
+        elif name in mapper.column_attrs:
+            if _is_query_expression(mapper.column_attrs[name]):
+                # loaded by with_expression() of the query itself
+                continue
+            columns.append(getattr(model, name))
+    return [load_only(*columns), *options]
+
+
+@cache
+def schema_load_options(
+    model: type[Base], schema: type[BaseModel]
+) -> tuple[LoaderOption, ...]:
+    """
+    Build loader options that fetch exactly the columns and
+    relationships `schema` serializes from `model`.
+    """
+    return tuple(_schema_loader_options(model, schema))
+
+
+def load_profile(name: str | None) -> tuple[LoaderOption, ...]:
+    if name is None:
+        return ()
+    if name in SCHEMA_PROFILES:
+        return schema_load_options(*SCHEMA_PROFILES[name])
+    return LOAD_PROFILES[name]
@@ -0,0 +1,107 @@
+from sqlalchemy import Integer, column, event, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import Post as PostDBModel
+
+COUNTERS = ("likes", "dislikes")
+
+_PENDING_DELTAS = "reaction_deltas"
+
+
+class ReactionBuffer:
+    """
+    Like/dislike counter deltas per post, added once the reactions
+    are committed and written to lz_posts in one batched UPDATE by
+    `flush`, so that a burst of reactions to one post doesn't queue
+    on its row lock. Deltas are kept per process: other workers see
+    them once flushed.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, dict[str, int]] = {}
+        self._flushing: dict[int, dict[str, int]] = {}
+
+    def add(self, post_id: int, deltas: dict[str, int]):
+        pending = self._pending.setdefault(post_id, dict.fromkeys(COUNTERS, 0))
+        for counter, delta in deltas.items():
+            pending[counter] += delta
+
+    def delta(self, post_id: int) -> dict[str, int]:
+        """Deltas of `post_id` not yet committed to lz_posts."""
+        total = dict.fromkeys(COUNTERS, 0)
+        for buffered in (self._pending, self._flushing):
+            for counter, delta in buffered.get(post_id, {}).items():
+                total[counter] += delta
+        return total
+
+    async def flush(self, db_session: AsyncSession) -> int:
+        if not self._pending:
+            return 0
+        self._flushing, self._pending = self._pending, {}
+        try:
+            posts = PostDBModel.__table__
+            deltas = values(
+                column("id", Integer),
+                column("likes", Integer),
+                column("dislikes", Integer),
+                name="deltas",
+            ).data(
+                [
+                    (post_id, delta["likes"], delta["dislikes"])
+                    for post_id, delta in sorted(self._flushing.items())
+                ]
+            )
+            await db_session.execute(
+                update(posts)
+                .where(posts.c.id == deltas.c.id)
+                .values(
+                    likes=posts.c.likes + deltas.c.likes,
+                    dislikes=posts.c.dislikes + deltas.c.dislikes,
+                )
+            )
+            await db_session.commit()
+        except BaseException:
+            # cancelled or failed, keep the deltas for the next flush
+            for post_id, delta in self._flushing.items():
+                self.add(post_id, delta)
+            raise
+        finally:
+            flushed = len(self._flushing)
+            self._flushing = {}
+        return flushed
+
+
+reaction_buffer = ReactionBuffer()
+
+
+def buffer_reaction_on_commit(
+    db_session: AsyncSession, post_id: int, deltas: dict[str, int]
+):
+    db_session.info.setdefault(_PENDING_DELTAS, []).append((post_id, deltas))
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_committed(session: Session):
+    for post_id, deltas in session.info.pop(_PENDING_DELTAS, ()):
+        reaction_buffer.add(post_id, deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop(_PENDING_DELTAS, None)
+
+
+def merge_pending_reactions(posts):
+    """Add buffered deltas to loaded posts, ORM objects or dict rows."""
+    for post in posts:
+        if isinstance(post, dict):
+            for counter, delta in reaction_buffer.delta(post["id"]).items():
+                post[counter] += delta
+            continue
+        for counter, delta in reaction_buffer.delta(post.id).items():
+            if delta:
+                # read-only objects, not to be flushed back
+                set_committed_value(
+                    post, counter, getattr(post, counter) + delta
+                )
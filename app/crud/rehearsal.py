@@ -1,17 +1,98 @@
 from fastapi import HTTPException
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import asc, desc, func, select
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.dialects.postgresql import Range, aggregate_order_by
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.rehearsal import RehearsalCreate
+from app.schemas.rehearsal import RehearsalCreate, RehearsalSeriesCreate
 from app.models import Rehearsal as RehearsalDBModel, RehearsalParticipant as RehearsalParticipantDBModel
-from app.models import User as UserDBModel
+from app.crud.counting import CountMode, TotalCount
+from app.crud.pagination import Page, Pagination, fetch_page
+from app.crud.sorting import compile_order
+from app.crud.profiles import load_profile
+from app.crud.rows import fetch_json
+from app.crud.calendar import invalidate_calendar_on_commit
 
-async def get_rehearsal(db_session: AsyncSession, rehearsal_id: int):
-    rehearsal = (
+EXCLUSION_VIOLATION = "23P01"
+BOOKING_CONSTRAINT = "lz_rehearsals_time_range_excl"
+
+
+def rehearsal_time_range(
+    start_time: datetime, duration: int
+) -> Range[datetime]:
+    return Range(start_time, start_time + timedelta(hours=duration))
+
+
+def is_booking_conflict(error: IntegrityError) -> bool:
+    """Whether `error` is a violation of the booking exclusion constraint."""
+    return (
+        getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+        and BOOKING_CONSTRAINT in str(error.orig)
+    )
+
+
+def _free_intervals(
+    busy: list[Range[datetime]],
+    range_from: datetime,
+    range_to: datetime,
+    granularity: timedelta,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Gaps between `busy` ranges (sorted by start) within
+    [range_from, range_to), narrowed to whole slots of `granularity`
+    counted from `range_from`.
+    """
+    free = []
+    free_from = range_from
+    for booked in busy:
+        if booked.lower > free_from:
+            free.append((free_from, booked.lower))
+        free_from = max(free_from, booked.upper)
+    if free_from < range_to:
+        free.append((free_from, range_to))
+    slots = []
+    for start, end in free:
+        start = range_from - (range_from - start) // granularity * granularity
+        end = range_from + (end - range_from) // granularity * granularity
+        if end > start:
+            slots.append((start, end))
+    return slots
+
+
+async def get_free_intervals(
+    db_session: AsyncSession,
+    range_from: datetime,
+    range_to: datetime,
+    granularity: timedelta,
+) -> list[tuple[datetime, datetime]]:
+    # past time can't be booked, so it is never free
+    now = datetime.now(timezone.utc)
+    busy = (
         await db_session.scalars(
-            select(RehearsalDBModel).where(
-                RehearsalDBModel.id == rehearsal_id
+            select(RehearsalDBModel.time_range)
+            .where(
+                RehearsalDBModel.time_range.overlaps(
+                    Range(range_from, range_to)
+                )
             )
+            .order_by(RehearsalDBModel.start_time)
+        )
+    ).all()
+    if now > range_from:
+        busy.insert(0, Range(range_from, now))
+    return _free_intervals(busy, range_from, range_to, granularity)
+
+
+async def get_rehearsal(
+    db_session: AsyncSession,
+    rehearsal_id: int,
+    profile: str | None = "rehearsal_read",
+):
+    rehearsal = (
+        await db_session.scalars(
+            select(RehearsalDBModel)
+            .where(RehearsalDBModel.id == rehearsal_id)
+            .options(*load_profile(profile))
         )
     ).first()
     if not rehearsal:
@@ -23,8 +104,12 @@ async def get_rehearsals_multi(
     limit: int,
     offset: int,
     filter_from: datetime = None,
-    filter_to: datetime = None
-):
+    filter_to: datetime = None,
+    profile: str | None = "rehearsal_read",
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+    as_json: bool = False,
+) -> Page:
     select_stmt = select(RehearsalDBModel)
     count_stmt = select(func.count()).select_from(RehearsalDBModel)
     if filter_from:
@@ -33,63 +118,249 @@ async def get_rehearsals_multi(
     if filter_to:
         select_stmt = select_stmt.where(RehearsalDBModel.start_time < filter_to)
         count_stmt = count_stmt.where(RehearsalDBModel.start_time < filter_to)
-    rehearsals = (
-        await db_session.scalars(select_stmt.limit(limit).offset(offset))
-    ).all()
-    count = (await db_session.scalars(count_stmt)).one()
-    return rehearsals, count
+    pagination = Pagination(
+        compile_order(RehearsalDBModel, None, default="asc_start_time"),
+        limit,
+        offset,
+        cursor,
+    )
+    total_count = TotalCount(
+        count_mode,
+        count_stmt,
+        RehearsalDBModel,
+        filtered=bool(filter_from or filter_to),
+    )
+    if as_json:
+        return await fetch_json(
+            db_session, profile, select_stmt, pagination, total_count
+        )
+    return await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        load_profile(profile),
+    )
+
+def series_start_times(series: RehearsalSeriesCreate) -> list[datetime]:
+    step = timedelta(weeks=series.every_weeks)
+    return [series.start_time + i * step for i in range(series.occurrences)]
+
+
+async def insert_rehearsals(
+    db_session: AsyncSession,
+    user_id: int,
+    rehearsal: RehearsalCreate,
+    start_times: list[datetime],
+) -> list[dict]:
+    """
+    Book `rehearsal` at each of `start_times` with two multi-row
+    inserts, and return the rows as `RehearsalRead` dicts.
+    Overlapping bookings are rejected with 409.
+    """
+    try:
+        rows = (
+            await db_session.execute(
+                insert(RehearsalDBModel).returning(
+                    RehearsalDBModel.id,
+                    RehearsalDBModel.user_id,
+                    RehearsalDBModel.band_name,
+                    RehearsalDBModel.start_time,
+                    RehearsalDBModel.duration,
+                    sort_by_parameter_order=True,
+                ),
+                [
+                    {
+                        "user_id": user_id,
+                        "start_time": start_time,
+                        "duration": rehearsal.duration,
+                        "time_range": rehearsal_time_range(
+                            start_time, rehearsal.duration
+                        ),
+                        "band_name": rehearsal.band_name,
+                    }
+                    for start_time in start_times
+                ],
+            )
+        ).mappings().all()
+    except IntegrityError as e:
+        await db_session.rollback()
+        if is_booking_conflict(e):
+            raise HTTPException(status_code=409, detail="Выбранное время уже забронировано")
+        raise
+    participants = [
+        {"rehearsal_id": row["id"], "surname": surname}
+        for row in rows
+        for surname in rehearsal.participants
+    ]
+    if participants:
+        # one multi-row INSERT, not an executemany
+        await db_session.execute(
+            insert(RehearsalParticipantDBModel).values(participants)
+        )
+    invalidate_calendar_on_commit(db_session, *start_times)
+    return [
+        {
+            **row,
+            "rehearsal_participants": [
+                {"rehearsal_id": row["id"], "surname": surname}
+                for surname in rehearsal.participants
+            ],
+        }
+        for row in rows
+    ]
+
 
 async def create_rehearsal(
-    db_session: AsyncSession, rehearsal: RehearsalCreate, user: UserDBModel
-):
+    db_session: AsyncSession, rehearsal: RehearsalCreate, user_id: int
+) -> dict:
     if rehearsal.start_time < datetime.now(timezone.utc):
         raise HTTPException(status_code=422, detail="No way to book rehearsal in past")
-    existing_rehearsals = await get_rehearsals_multi(db_session, None, None, rehearsal.start_time, rehearsal.start_time+timedelta(hours=rehearsal.duration))
-    if existing_rehearsals[0]:
-        print(existing_rehearsals[0])
-        raise HTTPException(status_code=409, detail="Выбранное время уже забронировано") 
-    db_rehearsal = RehearsalDBModel(
-        user_id=user.id,
-        start_time=rehearsal.start_time,
-        duration=rehearsal.duration,
-        band_name=rehearsal.band_name,
+    (db_rehearsal,) = await insert_rehearsals(
+        db_session, user_id, rehearsal, [rehearsal.start_time]
     )
-    db_session.add(db_rehearsal)
-    await db_session.flush([db_rehearsal])
-    participants_for_db: list[RehearsalParticipantDBModel] = []
-    for p in rehearsal.participants:
-        participant = RehearsalParticipantDBModel(
-            surname=p,
-            rehearsal=db_rehearsal
-            )
-        db_session.add(participant)
-        participants_for_db.append(participant)
-
-    await db_session.flush(participants_for_db)
     return db_rehearsal
 
 
+async def create_rehearsal_series(
+    db_session: AsyncSession, series: RehearsalSeriesCreate, user_id: int
+) -> list[dict]:
+    if series.start_time < datetime.now(timezone.utc):
+        raise HTTPException(status_code=422, detail="No way to book rehearsal in past")
+    start_times = series_start_times(series)
+    time_ranges = [
+        rehearsal_time_range(start_time, series.duration)
+        for start_time in start_times
+    ]
+    # one query for all occurrences, the exclusion constraint
+    # still catches bookings made concurrently
+    booked = (
+        await db_session.scalars(
+            select(RehearsalDBModel.time_range).where(
+                or_(
+                    *(
+                        RehearsalDBModel.time_range.overlaps(time_range)
+                        for time_range in time_ranges
+                    )
+                )
+            )
+        )
+    ).all()
+    conflicts = [
+        time_range.lower
+        for time_range in time_ranges
+        if any(time_range.overlaps(b) for b in booked)
+    ]
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                "Выбранное время уже забронировано: "
+                + ", ".join(c.isoformat() for c in conflicts)
+            ),
+        )
+    return await insert_rehearsals(db_session, user_id, series, start_times)
+
+
 async def delete_rehearsal(db_session: AsyncSession, rehearsal_id: int):
     rehearsal_to_delete = await get_rehearsal(db_session, rehearsal_id)
     await db_session.delete(rehearsal_to_delete)
+    invalidate_calendar_on_commit(db_session, rehearsal_to_delete.start_time)
 
 async def get_user_rehearsals(
     db_session: AsyncSession,
     user_id: int,
     archive: bool,
     limit: int,
-    offset: int
-):
-    select_stmt = select(RehearsalDBModel).where(RehearsalDBModel.user_id == user_id)
-    count_stmt = select(func.count()).select_from(RehearsalDBModel).where(RehearsalDBModel.user_id == user_id)
+    offset: int,
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+) -> Page:
+    now = datetime.now(timezone.utc)
     if archive:
-        select_stmt = select_stmt.where(RehearsalDBModel.start_time < datetime.now(timezone.utc))
-        count_stmt = count_stmt.where(RehearsalDBModel.start_time < datetime.now(timezone.utc))
+        # most recent first
+        period = RehearsalDBModel.start_time < now
+        order = "desc_start_time"
     else:
-        select_stmt = select_stmt.where(RehearsalDBModel.start_time >= datetime.now(timezone.utc))
-        count_stmt = count_stmt.where(RehearsalDBModel.start_time >= datetime.now(timezone.utc))
-    rehearsals = (
-        await db_session.scalars(select_stmt.limit(limit).offset(offset))
-    ).all()
-    count = (await db_session.scalars(count_stmt)).one()
-    return rehearsals, count
\ No newline at end of file
+        period = RehearsalDBModel.start_time >= now
+        order = "asc_start_time"
+    select_stmt = select(RehearsalDBModel).where(
+        RehearsalDBModel.user_id == user_id, period
+    )
+    count_stmt = (
+        select(func.count())
+        .select_from(RehearsalDBModel)
+        .where(RehearsalDBModel.user_id == user_id, period)
+    )
+    pagination = Pagination(
+        compile_order(RehearsalDBModel, None, default=order),
+        limit,
+        offset,
+        cursor,
+    )
+    total_count = TotalCount(
+        count_mode, count_stmt, RehearsalDBModel, filtered=True
+    )
+    return await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        load_profile("rehearsal_read"),
+    )
+
+
+def _feed_conditions(user_id: int | None, since: datetime) -> list:
+    conditions = [RehearsalDBModel.start_time >= since]
+    if user_id is not None:
+        conditions.append(RehearsalDBModel.user_id == user_id)
+    return conditions
+
+
+async def get_feed_marker(
+    db_session: AsyncSession, user_id: int | None, since: datetime
+) -> tuple[int, int | None]:
+    """
+    Row count and highest id of a feed, answered from the indexes.
+    Rehearsals are never updated, so any booking or cancellation
+    changes one of them.
+    """
+    count, max_id = (
+        await db_session.execute(
+            select(func.count(), func.max(RehearsalDBModel.id)).where(
+                *_feed_conditions(user_id, since)
+            )
+        )
+    ).one()
+    return count, max_id
+
+
+async def stream_rehearsal_feed(
+    db_session: AsyncSession, user_id: int | None, since: datetime
+):
+    """Yield feed rows through a server-side cursor, oldest first."""
+    participants = (
+        select(
+            func.string_agg(
+                RehearsalParticipantDBModel.surname,
+                aggregate_order_by(", ", RehearsalParticipantDBModel.id),
+            )
+        )
+        .where(RehearsalParticipantDBModel.rehearsal_id == RehearsalDBModel.id)
+        .scalar_subquery()
+    )
+    result = await db_session.stream(
+        select(
+            RehearsalDBModel.id,
+            RehearsalDBModel.band_name,
+            RehearsalDBModel.start_time,
+            RehearsalDBModel.duration,
+            RehearsalDBModel.created_on,
+            participants.label("participants"),
+        )
+        .where(*_feed_conditions(user_id, since))
+        .order_by(RehearsalDBModel.start_time, RehearsalDBModel.id)
+        .execution_options(yield_per=500)
+    )
+    async for row in result.mappings():
+        yield row
@@ -1,17 +1,25 @@
 from fastapi import HTTPException
 from app.models import Role as RoleDBModel, Permission as PermissionDBModel
-from sqlalchemy import asc, desc, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.role import RoleCreate, RoleUpdate
 from app.models.user import User as UserDBModel
+from app.crud.user import bump_permissions_version, invalidate_principal
+from app.crud.counting import CountMode, TotalCount
+from app.crud.pagination import Page, Pagination, fetch_page
+from app.crud.sorting import compile_order
+from app.crud.profiles import load_profile
+from app.crud.rows import fetch_json
 
 
-async def get_role(db_session: AsyncSession, role_id: int):
+async def get_role(
+    db_session: AsyncSession, role_id: int, profile: str | None = None
+):
     role = (
         await db_session.scalars(
-            select(RoleDBModel).where(
-                RoleDBModel.id == role_id
-            )
+            select(RoleDBModel)
+            .where(RoleDBModel.id == role_id)
+            .options(*load_profile(profile))
         )
     ).first()
     return role
@@ -34,26 +42,27 @@ async def get_roles_multi(
     limit: int,
     offset: int,
     order_list: str,
-):
-    select_stmt = select(RoleDBModel)
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+    as_json: bool = False,
+) -> Page:
     count_stmt = select(func.count()).select_from(RoleDBModel)
-    if order_list is not None:
-        direction, sort_label = order_list.split("_", maxsplit=1)
-        if direction == "asc":
-            select_stmt = select_stmt.order_by(asc(sort_label))
-        elif direction == "desc":
-            select_stmt = select_stmt.order_by(desc(sort_label))
-        else:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Unexpectable order prefix {direction}",
-            )
-
-    roles = (
-        await db_session.scalars(select_stmt.limit(limit).offset(offset))
-    ).all()
-    count = (await db_session.scalars(count_stmt)).one()
-    return roles, count
+    pagination = Pagination(
+        compile_order(RoleDBModel, order_list), limit, offset, cursor
+    )
+    total_count = TotalCount(count_mode, count_stmt, RoleDBModel)
+    select_stmt = select(RoleDBModel)
+    if as_json:
+        return await fetch_json(
+            db_session, "role_read", select_stmt, pagination, total_count
+        )
+    return await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        load_profile("role_read"),
+    )
 
 
 async def create_role(
@@ -98,7 +107,9 @@ async def delete_role(db_session: AsyncSession, role_id: int):
     role_to_delete = await get_role(db_session, role_id)
     if not role_to_delete:
         raise KeyError("Role not found")
+    await bump_permissions_version(db_session, role_id=role_id)
     await db_session.delete(role_to_delete)
+    invalidate_principal(db_session)
 
 
 async def assign_permissions(
@@ -106,7 +117,7 @@ async def assign_permissions(
     role_id: int,
     permission_names: list[str],
 ):
-    role = await get_role(db_session, role_id)
+    role = await get_role(db_session, role_id, profile="role_permissions")
     if not role:
         raise KeyError("Role not found")
     for permission_key in permission_names:
@@ -124,6 +135,8 @@ async def assign_permissions(
                 f"Permission '{permission.permission_key}' is already in role"
             )
         role.role_permissions.append(permission)
+    await bump_permissions_version(db_session, role_id=role_id)
+    invalidate_principal(db_session)
     return role.role_permissions
 
 
@@ -132,7 +145,7 @@ async def delete_permissions(
     role_id: int,
     permission_names: list[str],
 ):
-    role = await get_role(db_session, role_id)
+    role = await get_role(db_session, role_id, profile="role_permissions")
     if not role:
         raise KeyError("Role not found")
     role.role_permissions = [
@@ -140,13 +153,15 @@ async def delete_permissions(
         for x in role.role_permissions
         if x.permission_key not in permission_names
     ]
+    await bump_permissions_version(db_session, role_id=role_id)
+    invalidate_principal(db_session)
     return role.role_permissions
 
 
 async def get_permissions(
     db_session: AsyncSession, role_id: int
 ):
-    role = await get_role(db_session, role_id)
+    role = await get_role(db_session, role_id, profile="role_permissions")
     if not role:
         raise KeyError("Role not found")
     return role.role_permissions
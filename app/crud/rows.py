@@ -0,0 +1,165 @@
+from functools import cache
+from typing import Any, Callable
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import RelationshipDirection, RelationshipProperty
+from sqlalchemy.sql.elements import ColumnElement
+from app.crud.counting import TOTAL_COUNT, TotalCount
+from app.crud.pagination import Page, Pagination
+from app.crud.profiles import SCHEMA_PROFILES, nested_schema
+from app.database import Base
+
+# Fast path for list endpoints: rows are fetched with Core selects as
+# plain dicts shaped like the response schema and dumped straight to
+# JSON bytes, skipping ORM instances and the identity map.
+
+PARENT_KEY = "_parent_key"
+
+
+@cache
+def _adapter(type_) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def dump_rows(schema: type[BaseModel], rows: list[dict]) -> bytes:
+    adapter = _adapter(list[schema])
+    return adapter.dump_json(adapter.validate_python(rows))
+
+
+def dump_row(schema: type[BaseModel], row: dict) -> bytes:
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(row))
+
+
+async def fetch_json(
+    db_session: AsyncSession,
+    profile: str,
+    select_stmt: Select,
+    pagination: Pagination,
+    total_count: TotalCount,
+    prepare: Callable[[list[dict]], Any] | None = None,
+    expressions: dict[str, ColumnElement] | None = None,
+) -> Page:
+    """
+    JSON counterpart of `fetch_page`: a page of one of the schema
+    profiles, with items already dumped to JSON bytes. `expressions`
+    fill query_expression() attributes of the schema, `prepare` may
+    adjust the rows in place before they are dumped.
+    """
+    model, schema = SCHEMA_PROFILES[profile]
+    window = total_count.window(pagination.cursor)
+    rows = await fetch_rows(
+        db_session,
+        model,
+        schema,
+        pagination.apply(select_stmt),
+        extra_columns={**(expressions or {}), **pagination.columns, **window},
+    )
+    window_total = rows[0][TOTAL_COUNT] if rows and window else None
+    rows, next_cursor = pagination.page(rows, dict.get)
+    if prepare is not None:
+        prepare(rows)
+    total, estimated = await total_count.resolve(
+        db_session,
+        window_total,
+        pagination.cursor,
+        seen=(pagination.offset or 0) + len(rows),
+    )
+    return Page(dump_rows(schema, rows), total, next_cursor, estimated)
+
+
+async def fetch_rows(
+    db_session: AsyncSession,
+    model: type[Base],
+    schema: type[BaseModel],
+    select_stmt: Select,
+    parent_key: ColumnElement | None = None,
+    extra_columns: dict[str, ColumnElement] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Execute `select_stmt` (any select over `model`, with its filters,
+    ordering and limits) projecting only the columns `schema` needs,
+    then fetch nested relationships with one query per relationship.
+    """
+    mapper = inspect(model)
+    columns = {}
+    for column in mapper.primary_key:
+        columns[mapper.get_property_by_column(column).key] = column
+    relationships: list[tuple[str, RelationshipProperty, type]] = []
+    for name, field in schema.model_fields.items():
+        if name in mapper.relationships:
+            relationship = mapper.relationships[name]
+            relationships.append(
+                (name, relationship, nested_schema(field.annotation))
+            )
+            for local, _ in relationship.local_remote_pairs:
+                if local.table is mapper.local_table:
+                    key = mapper.get_property_by_column(local).key
+                    columns[key] = local
+        elif name in mapper.column_attrs:
+            columns[name] = mapper.column_attrs[name].columns[0]
+    columns.update(extra_columns or {})
+    labeled_columns = [c.label(key) for key, c in columns.items()]
+    if parent_key is not None:
+        labeled_columns.append(parent_key.label(PARENT_KEY))
+    rows = [
+        dict(row)
+        for row in (
+            await db_session.execute(
+                select_stmt.with_only_columns(*labeled_columns)
+            )
+        ).mappings()
+    ]
+    for name, relationship, relationship_schema in relationships:
+        await _attach_relationship(
+            db_session, rows, name, relationship, relationship_schema
+        )
+    return rows
+
+
+async def _attach_relationship(
+    db_session: AsyncSession,
+    rows: list[dict],
+    name: str,
+    relationship: RelationshipProperty,
+    schema: type[BaseModel],
+):
+    parent_mapper = relationship.parent
+    target = relationship.mapper.class_
+    if relationship.direction is RelationshipDirection.MANYTOONE:
+        ((local, remote),) = relationship.local_remote_pairs
+        select_stmt = select(target)
+    elif relationship.direction is RelationshipDirection.ONETOMANY:
+        ((local, remote),) = relationship.synchronize_pairs
+        select_stmt = select(target)
+    else:
+        ((local, remote),) = relationship.synchronize_pairs
+        ((target_key, secondary_key),) = (
+            relationship.secondary_synchronize_pairs
+        )
+        select_stmt = select(target).join(
+            relationship.secondary, target_key == secondary_key
+        )
+    local_key = parent_mapper.get_property_by_column(local).key
+    keys = {row[local_key] for row in rows} - {None}
+    related = []
+    if keys:
+        related = await fetch_rows(
+            db_session,
+            target,
+            schema,
+            select_stmt.where(remote.in_(keys)),
+            parent_key=remote,
+        )
+    if not relationship.uselist:
+        related_by_key = {r[PARENT_KEY]: r for r in related}
+        for row in rows:
+            row[name] = related_by_key.get(row[local_key])
+        return
+    grouped: dict[Any, list] = {}
+    for r in related:
+        grouped.setdefault(r[PARENT_KEY], []).append(r)
+    for row in rows:
+        row[name] = grouped.get(row[local_key], [])
@@ -1,7 +1,8 @@
+import uuid as uuid_pkg
+from datetime import datetime, timedelta, timezone
 from app.models import User as UserDBModel
 from app.models import UserSession as UserSessionDBModel
-from jose import jwt
-from sqlalchemy import select
+from sqlalchemy import Row, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.auth import RefreshToken
 from app.utils.auth import decode_jwt
@@ -20,20 +21,57 @@ credentials_exception = HTTPException(
 
 
 async def create_user_session(db_session: AsyncSession, user: UserDBModel):
-    session = UserSessionDBModel(user=user)
+    # keep at most MAX_SESSIONS_PER_USER sessions, the oldest ones go
+    sessions = UserSessionDBModel.__table__
+    stale_sessions = (
+        select(sessions.c.uuid)
+        .where(sessions.c.user_id == user.id)
+        .order_by(sessions.c.created_on.desc())
+        .offset(settings.MAX_SESSIONS_PER_USER - 1)
+    )
+    await db_session.execute(
+        delete(sessions).where(sessions.c.uuid.in_(stale_sessions))
+    )
+    session = UserSessionDBModel(user_id=user.id)
     db_session.add(session)
     return session
 
 
+async def delete_user_sessions(db_session: AsyncSession, user_id: int):
+    sessions = UserSessionDBModel.__table__
+    await db_session.execute(
+        delete(sessions).where(sessions.c.user_id == user_id)
+    )
+
+
+async def delete_expired_sessions(
+    db_session: AsyncSession, batch_size: int
+) -> int:
+    """
+    Delete up to `batch_size` sessions older than refresh token
+    lifetime, return number of deleted rows.
+    """
+    sessions = UserSessionDBModel.__table__
+    expired_before = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.REFRESH_TOKEN_EXPIRES_IN
+    )
+    expired_sessions = (
+        select(sessions.c.uuid)
+        .where(sessions.c.created_on < expired_before)
+        .limit(batch_size)
+    )
+    result = await db_session.execute(
+        delete(sessions).where(sessions.c.uuid.in_(expired_sessions))
+    )
+    return result.rowcount
+
+
 async def delete_user_session(
     db_session: AsyncSession, refresh_token: RefreshToken
 ):
     try:
-        payload = jwt.decode(
-            token=refresh_token.refresh_token,
-            key=settings.JWT_PRIVATE_KEY,
-            algorithms=["HS256"],
-            options={"verify_exp": False},
+        payload = decode_jwt(
+            token=refresh_token.refresh_token, verify_exp=False
         )
     except JWTError:
         raise credentials_exception
@@ -54,18 +92,30 @@ async def delete_user_session(
 
 async def update_user_session(
     db_session: AsyncSession, refresh_token: RefreshToken
-):
+) -> Row | None:
+    """
+    Rotate session uuid in place with a single UPDATE .. RETURNING.
+    Of two concurrent refreshes with the same token only the first one
+    matches the old uuid, the other gets None.
+    """
     try:
         payload = decode_jwt(token=refresh_token.refresh_token)
     except JWTError:
         raise credentials_exception
-    session_uuid = payload.get("sub")
-    if session_uuid is None:
-        return session_uuid
-    session = await db_session.get(UserSessionDBModel, session_uuid)
-    if not session:
-        return session
-    user = session.user
-    await db_session.delete(session)
-    new_session = await create_user_session(db_session, user)
+    try:
+        session_uuid = uuid_pkg.UUID(payload.get("sub"))
+    except (TypeError, ValueError):
+        return None
+    sessions = UserSessionDBModel.__table__
+    users = UserDBModel.__table__
+    rotate_stmt = (
+        update(sessions)
+        .where(
+            sessions.c.uuid == session_uuid,
+            sessions.c.user_id == users.c.id,
+        )
+        .values(uuid=uuid_pkg.uuid4(), created_on=func.CURRENT_TIMESTAMP())
+        .returning(sessions.c.uuid, sessions.c.user_id, users.c.username)
+    )
+    new_session = (await db_session.execute(rotate_stmt)).first()
     return new_session
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+from app.database import Base
+from app.models import Post, PostComment, Rehearsal, Role, User
+
+# Keys clients may sort by. Every key is the leading column of an
+# index ending with the primary key, see the models' __table_args__.
+SORT_KEYS: dict[type[Base], dict[str, InstrumentedAttribute]] = {
+    User: {
+        "id": User.id,
+        "username": User.username,
+        "full_name": User.full_name,
+        "created_on": User.created_on,
+    },
+    Role: {
+        "id": Role.id,
+        "name": Role.name,
+    },
+    Post: {
+        "id": Post.id,
+        "created_on": Post.created_on,
+        "likes": Post.likes,
+    },
+    PostComment: {
+        "id": PostComment.id,
+        "created_on": PostComment.created_on,
+    },
+    Rehearsal: {
+        "id": Rehearsal.id,
+        "start_time": Rehearsal.start_time,
+    },
+}
+
+
+@dataclass(frozen=True)
+class SortKey:
+    name: str
+    column: InstrumentedAttribute | ColumnElement
+    descending: bool = False
+
+    @property
+    def nullable(self) -> bool:
+        if not isinstance(self.column, InstrumentedAttribute):
+            # computed keys, such as a search rank, are never NULL
+            return False
+        return self.column.property.columns[0].nullable
+
+    def order_by(self):
+        return self.column.desc() if self.descending else self.column.asc()
+
+
+def _parse_key(allowed: dict[str, InstrumentedAttribute], item: str):
+    direction, _, sort_label = item.strip().partition("_")
+    if direction not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unexpectable order prefix {direction}",
+        )
+    if sort_label not in allowed:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Unexpectable order label {sort_label}, "
+                f"expected one of: {', '.join(allowed)}"
+            ),
+        )
+    return SortKey(
+        sort_label, allowed[sort_label], descending=direction == "desc"
+    )
+
+
+def compile_order(
+    model: type[Base], order_list: str | None, default: str = "asc_id"
+) -> list[SortKey]:
+    """
+    Compile `order_list` such as "desc_likes,asc_created_on" into
+    sort keys of `model`, falling back to `default`. The primary key
+    is appended as a tiebreaker so that paging is stable.
+    """
+    allowed = SORT_KEYS[model]
+    keys = [
+        _parse_key(allowed, item)
+        for item in (order_list or default).split(",")
+    ]
+    if len({key.name for key in keys}) != len(keys):
+        raise HTTPException(
+            status_code=422, detail="Order label is repeated"
+        )
+    (primary_key,) = inspect(model).primary_key
+    if primary_key.key not in {key.name for key in keys}:
+        keys.append(
+            SortKey(
+                primary_key.key,
+                allowed[primary_key.key],
+                descending=keys[-1].descending,
+            )
+        )
+    return keys
@@ -1,25 +1,50 @@
 from datetime import datetime, timezone
 from app.models import User as UserDBModel
 from app.models import Role as RoleDBModel
+from app.models.user import user_roles_table
 from fastapi import HTTPException
-from sqlalchemy import asc, desc, select, func
+from sqlalchemy import event, select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.schemas.user import UserCreate
 from app.schemas.user import UserUpdate
 from app.schemas.user import UserUpdatePassword
 from app.schemas.user import UserResetPassword
-from app.utils.auth import get_password_hash, verify_password
+from app.schemas.auth import Principal
+from app.crud.counting import CountMode, TotalCount
+from app.crud.pagination import Page, Pagination, fetch_page
+from app.crud.sorting import compile_order
+from app.crud.profiles import load_profile
+from app.crud.rows import fetch_json
+from app.crud.session import delete_user_sessions
+from app.crud.calendar import invalidate_calendar_on_commit
+from app.utils.auth import password_hasher
+from app.utils.cache import TTLCache
+from app.config import get_settings
 
+settings = get_settings()
 
-async def get_user(db_session: AsyncSession, user_id: int):
-    user = await db_session.get(UserDBModel, user_id)
+# token subject (username) -> Principal
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+# user id -> permissions version
+permissions_version_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PERMISSIONS_VERSION_CACHE_TTL,
+)
+
+
+async def get_user(
+    db_session: AsyncSession, user_id: int, profile: str | None = "user_read"
+):
     user = (
-            await db_session.scalars(
-                select(UserDBModel).where(
-                    UserDBModel.id == user_id,
-                )
-            )
-        ).first()
+        await db_session.scalars(
+            select(UserDBModel)
+            .where(UserDBModel.id == user_id)
+            .options(*load_profile(profile))
+        )
+    ).first()
     if user is None:
         raise HTTPException(
             status_code=404, detail=f"User id={user_id} not found"
@@ -27,15 +52,141 @@ async def get_user(db_session: AsyncSession, user_id: int):
     return user
 
 
-async def get_user_by_username(db_session: AsyncSession, username: str):
+async def get_user_by_username(
+    db_session: AsyncSession, username: str, profile: str | None = "auth"
+):
     user = (
         await db_session.scalars(
-            select(UserDBModel).where(UserDBModel.username == username)
+            select(UserDBModel)
+            .where(UserDBModel.username == username)
+            .options(*load_profile(profile))
         )
     ).first()
     return user
 
 
+async def get_principal(
+    db_session: AsyncSession, username: str
+) -> Principal | None:
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+    user = await get_user_by_username(db_session, username)
+    if user is None:
+        return None
+    return principal_from_user(user)
+
+
+def principal_from_user(user: UserDBModel) -> Principal:
+    principal = Principal(
+        id=user.id,
+        username=user.username,
+        is_superadmin=user.is_superadmin,
+        permissions=frozenset(get_user_permissions(user)),
+        permissions_version=user.permissions_version,
+    )
+    principal_cache.set(principal.username, principal)
+    permissions_version_cache.set(
+        principal.id, principal.permissions_version
+    )
+    return principal
+
+
+_PENDING_INVALIDATIONS = "auth_cache_invalidations"
+
+
+def _invalidate_on_commit(
+    db_session: AsyncSession, cache: TTLCache, key=None
+):
+    # dropping the entry before commit would let a concurrent request
+    # cache the old committed row again until the TTL runs out
+    db_session.info.setdefault(_PENDING_INVALIDATIONS, []).append(
+        (cache, key)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for cache, key in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        if key is None:
+            cache.clear()
+        else:
+            cache.pop(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+def invalidate_principal(
+    db_session: AsyncSession, username: str | None = None
+):
+    """
+    Drop cached principal for `username`, or all of them when
+    called without arguments (e.g. after role permissions change),
+    once `db_session` commits.
+    """
+    _invalidate_on_commit(db_session, principal_cache, username)
+
+
+async def get_permissions_version(
+    db_session: AsyncSession, user_id: int
+) -> int | None:
+    version = permissions_version_cache.get(user_id)
+    if version is not None:
+        return version
+    version = (
+        await db_session.scalars(
+            select(UserDBModel.permissions_version).where(
+                UserDBModel.id == user_id
+            )
+        )
+    ).first()
+    if version is not None:
+        permissions_version_cache.set(user_id, version)
+    return version
+
+
+async def get_feed_token_version(
+    db_session: AsyncSession, user_id: int
+) -> int | None:
+    return (
+        await db_session.scalars(
+            select(UserDBModel.feed_token_version).where(
+                UserDBModel.id == user_id
+            )
+        )
+    ).first()
+
+
+async def bump_permissions_version(
+    db_session: AsyncSession,
+    user_id: int | None = None,
+    role_id: int | None = None,
+):
+    """
+    Invalidate permission claims of a single user, or of every
+    user holding `role_id`.
+    """
+    update_stmt = update(UserDBModel).values(
+        permissions_version=UserDBModel.permissions_version + 1
+    )
+    if user_id is not None:
+        update_stmt = update_stmt.where(UserDBModel.id == user_id)
+        _invalidate_on_commit(db_session, permissions_version_cache, user_id)
+    else:
+        update_stmt = update_stmt.where(
+            UserDBModel.id.in_(
+                select(user_roles_table.c.user_id).where(
+                    user_roles_table.c.role_id == role_id
+                )
+            )
+        )
+        _invalidate_on_commit(db_session, permissions_version_cache)
+    await db_session.execute(update_stmt)
+
+
 async def check_email(db_session: AsyncSession, email: str):
     user = (
         await db_session.scalars(
@@ -54,25 +205,73 @@ async def get_users_multi(
     limit: int,
     offset: int,
     order_list: str,
-) -> tuple[list[UserDBModel], int]:
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+    as_json: bool = False,
+) -> Page:
     count_stmt = select(func.count()).select_from(UserDBModel)
-    select_stmt = select(UserDBModel).limit(limit).offset(offset)
-
-    if order_list is not None:
-        direction, sort_label = order_list.split("_", maxsplit=1)
-        if direction == "asc":
-            select_stmt = select_stmt.order_by(asc(sort_label))
-        elif direction == "desc":
-            select_stmt = select_stmt.order_by(desc(sort_label))
-        else:
+    pagination = Pagination(
+        compile_order(UserDBModel, order_list), limit, offset, cursor
+    )
+    total_count = TotalCount(count_mode, count_stmt, UserDBModel)
+    select_stmt = select(UserDBModel)
+    if as_json:
+        return await fetch_json(
+            db_session, "user_view", select_stmt, pagination, total_count
+        )
+    return await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        load_profile("user_view"),
+    )
+
+
+async def get_user_roles(
+    db_session: AsyncSession,
+    user_id: int,
+    limit: int,
+    offset: int,
+    order_list: str | None = None,
+    cursor: str | None = None,
+    count_mode: CountMode = "auto",
+) -> Page:
+    select_stmt = (
+        select(RoleDBModel)
+        .join(user_roles_table, user_roles_table.c.role_id == RoleDBModel.id)
+        .where(user_roles_table.c.user_id == user_id)
+    )
+    count_stmt = (
+        select(func.count())
+        .select_from(user_roles_table)
+        .where(user_roles_table.c.user_id == user_id)
+    )
+    pagination = Pagination(
+        compile_order(RoleDBModel, order_list), limit, offset, cursor
+    )
+    total_count = TotalCount(
+        count_mode, count_stmt, RoleDBModel, filtered=True
+    )
+    page = await fetch_page(
+        db_session,
+        select_stmt,
+        pagination,
+        total_count,
+        load_profile("role_view"),
+    )
+    if not page.items:
+        # nothing to page through, tell an unknown user from a roleless one
+        user_exists = (
+            await db_session.scalars(
+                select(UserDBModel.id).where(UserDBModel.id == user_id)
+            )
+        ).first()
+        if user_exists is None:
             raise HTTPException(
-                status_code=422,
-                detail=f"Unexpectable order prefix {direction}",
+                status_code=404, detail=f"User id={user_id} not found"
             )
-
-    users = (await db_session.scalars(select_stmt)).all()
-    count = (await db_session.scalars(count_stmt)).one()
-    return users, count
+    return page
 
 
 async def authenticate_user(
@@ -81,7 +280,7 @@ async def authenticate_user(
     user = await get_user_by_username(db_session, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
     return user
 
@@ -89,7 +288,9 @@ async def authenticate_user(
 async def create_user(
     db_session: AsyncSession, user: UserCreate
 ):
-    db_user = await get_user_by_username(db_session, username=user.username)
+    db_user = await get_user_by_username(
+        db_session, username=user.username, profile=None
+    )
     if db_user is not None:
         raise HTTPException(
             status_code=409, detail="Username already registered"
@@ -98,7 +299,7 @@ async def create_user(
         username=user.username,
         email=user.email,
         full_name=user.full_name,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await password_hasher.hash(user.password),
     )
     db_session.add(db_user)
     return db_user
@@ -112,11 +313,12 @@ async def update_user(
     user = await get_user(db_session, user_id)
     if user.is_superadmin:
         raise HTTPException(status_code=403)
+    invalidate_principal(db_session, user.username)
     if user_patch.email is not None:
         user.email = user_patch.email
     if user_patch.username is not None:
         duplicate_user = await get_user_by_username(
-            db_session, user_patch.username
+            db_session, user_patch.username, profile=None
         )
         if duplicate_user and duplicate_user != user_id:
             raise HTTPException(
@@ -124,6 +326,7 @@ async def update_user(
                 detail=f"Username '{user_patch.username}' already registered",
             )
         user.username = user_patch.username
+        await bump_permissions_version(db_session, user_id=user_id)
     if user_patch.full_name is not None:
         user.full_name = user_patch.full_name
     user.edited_on = datetime.now(timezone.utc)
@@ -136,13 +339,18 @@ async def update_user_password(
     password_form: UserUpdatePassword,
 ):
     user = await get_user(db_session, user_id)
-    if not verify_password(password_form.old_password, user.hashed_password):
+    if not await password_hasher.verify(
+        password_form.old_password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=400, detail="Old password is incorrect"
         )
-    for session in user.sessions:
-        await db_session.delete(session)
-    user.hashed_password = get_password_hash(password_form.new_password)
+    await delete_user_sessions(db_session, user_id)
+    invalidate_principal(db_session, user.username)
+    user.feed_token_version += 1
+    user.hashed_password = await password_hasher.hash(
+        password_form.new_password
+    )
     user.edited_on = datetime.now(timezone.utc)
     return user
 
@@ -154,19 +362,29 @@ async def reset_user_password(
     password_form: UserResetPassword,
 ):
     user = await get_user(db_session, user_id)
-    for session in user.sessions:
-        await db_session.delete(session)
-    user.hashed_password = get_password_hash(password_form.new_password)
+    await delete_user_sessions(db_session, user_id)
+    invalidate_principal(db_session, user.username)
+    user.feed_token_version += 1
+    user.hashed_password = await password_hasher.hash(
+        password_form.new_password
+    )
     user.edited_on = datetime.now(timezone.utc)
     return user
 
 
 async def delete_user(db_session: AsyncSession, user_id: int):
-    user_to_delete = await get_user(db_session, user_id)
+    user_to_delete = await get_user(
+        db_session, user_id, profile="user_delete"
+    )
     if user_to_delete.is_superadmin:
         raise HTTPException(
             status_code=403, detail="Admin user is protected from deletion"
         )
+    invalidate_principal(db_session, user_to_delete.username)
+    _invalidate_on_commit(db_session, permissions_version_cache, user_id)
+    invalidate_calendar_on_commit(
+        db_session, *(r.start_time for r in user_to_delete.rehearsals)
+    )
     await db_session.delete(user_to_delete)
 
 
@@ -175,7 +393,8 @@ async def assign_roles(
     user_id: int,
     role_names: list[str],
 ):
-    user = await get_user(db_session, user_id)
+    user = await get_user(db_session, user_id, profile="user_roles")
+    invalidate_principal(db_session, user.username)
     for role_name in role_names:
         role = (
             await db_session.scalars(
@@ -191,6 +410,7 @@ async def assign_roles(
                 status_code=409, detail=f"User already has '{role.name}' role"
             )
         user.user_roles.append(role)
+    await bump_permissions_version(db_session, user_id=user_id)
     return user.user_roles
 
 
@@ -199,9 +419,11 @@ async def delete_roles(
     user_id: int,
     role_names: list[str],
 ):
-    user = await get_user(db_session, user_id)
+    user = await get_user(db_session, user_id, profile="user_roles")
+    invalidate_principal(db_session, user.username)
     user.user_roles = [x for x in user.user_roles if x.name not in role_names]
     # ^ выглядит как сущий кошмар. поискать способ получше?
+    await bump_permissions_version(db_session, user_id=user_id)
     return user.user_roles
 
 
@@ -7,11 +7,57 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.database import sessionmanager
 from app.api.api import api_router
 from app.config import get_settings
+from app.crud.calendar import calendar_cache
+from app.crud.reactions import reaction_buffer
+from app.crud.session import delete_expired_sessions
+from app.utils.auth import password_hasher
+from app.utils.background import PeriodicTask
 
 settings = get_settings()
 
 
 logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+async def sweep_expired_sessions():
+    batch_size = settings.SESSION_SWEEP_BATCH_SIZE
+    async with sessionmanager.session() as db_session:
+        while True:
+            deleted = await delete_expired_sessions(db_session, batch_size)
+            await db_session.commit()
+            if deleted < batch_size:
+                break
+
+
+session_sweeper = PeriodicTask(
+    sweep_expired_sessions,
+    settings.SESSION_SWEEP_INTERVAL,
+    "session-sweeper",
+)
+
+
+async def flush_reaction_buffer():
+    async with sessionmanager.session() as db_session:
+        await reaction_buffer.flush(db_session)
+
+
+reaction_flusher = PeriodicTask(
+    flush_reaction_buffer,
+    settings.REACTION_FLUSH_INTERVAL,
+    "reaction-flusher",
+)
+
+
+async def log_cache_stats():
+    logger.info("calendar cache stats: %s", calendar_cache.stats())
+
+
+cache_stats_logger = PeriodicTask(
+    log_cache_stats,
+    settings.CACHE_STATS_INTERVAL,
+    "cache-stats",
+)
 
 
 @asynccontextmanager
@@ -20,7 +66,21 @@ async def lifespan(app: FastAPI):
     Function that handles startup and shutdown events.
     To understand more, read https://fastapi.tiangolo.com/advanced/events/
     """
+    session_sweeper.start()
+    reaction_flusher.start()
+    cache_stats_logger.start()
     yield
+    await session_sweeper.stop()
+    await reaction_flusher.stop()
+    await cache_stats_logger.stop()
+    await log_cache_stats()
+    try:
+        # counts buffered since the last flush
+        await flush_reaction_buffer()
+    except Exception:
+        # still release the hasher pool and the engine below
+        logger.exception("final flush of reaction counts failed")
+    password_hasher.shutdown()
     if sessionmanager._engine is not None:
         # Close the DB connection
         await sessionmanager.close()
@@ -37,5 +97,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["x-total-count"],
+    expose_headers=[
+        "x-total-count",
+        "x-total-count-estimated",
+        "x-next-cursor",
+    ],
 )
\ No newline at end of file
@@ -1,4 +1,4 @@
 from app.database import Base
 from .user import User, Role, Permission, UserSession
 from .rehearsal import Rehearsal, RehearsalParticipant
-from .post import Post, PostComment
+from .post import Post, PostComment, PostReaction
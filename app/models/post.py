@@ -1,13 +1,27 @@
 import datetime
 from typing import List
 
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, query_expression
 from sqlalchemy.orm import relationship
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import CheckConstraint, Computed, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.database import Base
 
+# text search configuration of Post.search_vector,
+# queries against it must use the same one
+SEARCH_CONFIG = "russian"
+
 class Post(Base):
     __tablename__ = "lz_posts"
+    __table_args__ = (
+        Index("ix_lz_posts_created_on_id", "created_on", "id"),
+        Index("ix_lz_posts_likes_id", "likes", "id"),
+        Index(
+            "ix_lz_posts_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, index=True
@@ -18,7 +32,7 @@ class Post(Base):
     dislikes: Mapped[int] = mapped_column(default=0)
     user_id: Mapped[int] = mapped_column(ForeignKey("lz_users.id"))
     user: Mapped["User"] = relationship(
-        back_populates="posts", lazy="selectin"
+        back_populates="posts"
     )
     created_on: Mapped[datetime.datetime] = mapped_column(
         nullable=False, default=func.CURRENT_TIMESTAMP()
@@ -28,12 +42,31 @@ class Post(Base):
     )
     post_comments: Mapped[List["PostComment"]] = relationship(
         back_populates="post",
-        lazy="selectin",
         cascade="delete, delete-orphan"
     )
+    # not a column, filled in by queries that ask for it
+    comment_count: Mapped[int] = query_expression()
+    # title weighs more than text in search ranking
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', text), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
 class PostComment(Base):
     __tablename__ = "lz_post_comments"
+    __table_args__ = (
+        Index(
+            "ix_lz_post_comments_post_id_created_on_id",
+            "post_id",
+            "created_on",
+            "id",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, index=True
@@ -41,10 +74,31 @@ class PostComment(Base):
     text: Mapped[str] = mapped_column()
     user_id: Mapped[int] = mapped_column(ForeignKey("lz_users.id"))
     user: Mapped["User"] = relationship(
-        back_populates="comments", lazy="selectin"
+        back_populates="comments"
     )
     post_id: Mapped[int] = mapped_column(ForeignKey("lz_posts.id"))
     post: Mapped["Post"] = relationship(
-        back_populates="post_comments", lazy="selectin"
+        back_populates="post_comments"
+    )
+    created_on: Mapped[datetime.datetime] = mapped_column(nullable=False, default=func.CURRENT_TIMESTAMP())
+
+
+class PostReaction(Base):
+    """At most one reaction per user and post, counted in Post."""
+    __tablename__ = "lz_post_reactions"
+    __table_args__ = (
+        CheckConstraint(
+            "reaction IN ('like', 'dislike')",
+            name="lz_post_reactions_reaction_check",
+        ),
+        # the primary key serves lookups by post only
+        Index("ix_lz_post_reactions_user_id", "user_id"),
+    )
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("lz_posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("lz_users.id", ondelete="CASCADE"), primary_key=True
     )
-    created_on: Mapped[datetime.datetime] = mapped_column(nullable=False, default=func.CURRENT_TIMESTAMP())
\ No newline at end of file
+    reaction: Mapped[str] = mapped_column(nullable=False)
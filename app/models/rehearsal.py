@@ -3,25 +3,50 @@ from typing import List
 
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import TSTZRANGE, ExcludeConstraint, Range
 from app.database import Base
 
 class Rehearsal(Base):
     __tablename__ = "lz_rehearsals"
+    __table_args__ = (
+        Index("ix_lz_rehearsals_start_time_id", "start_time", "id"),
+        Index(
+            "ix_lz_rehearsals_user_id_start_time_id",
+            "user_id",
+            "start_time",
+            "id",
+        ),
+        # the room can't be booked twice for the same time
+        ExcludeConstraint(
+            ("time_range", "&&"),
+            name="lz_rehearsals_time_range_excl",
+            using="gist",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, index=True
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("lz_users.id"))
     user: Mapped["User"] = relationship(
-        back_populates="rehearsals", lazy="selectin"
+        back_populates="rehearsals"
     )
     start_time: Mapped[datetime.datetime] = mapped_column(nullable=False)
     duration: Mapped[int] = mapped_column(nullable=False)
+    # [start_time, start_time + duration hours), set by crud
+    time_range: Mapped[Range[datetime.datetime]] = mapped_column(
+        TSTZRANGE, nullable=False
+    )
     band_name: Mapped[str] = mapped_column()
+    # DTSTAMP of the .ics feeds
+    created_on: Mapped[datetime.datetime] = mapped_column(
+        nullable=False,
+        default=func.CURRENT_TIMESTAMP(),
+        server_default=func.now(),
+    )
     rehearsal_participants: Mapped[List["RehearsalParticipant"]] = relationship(
         back_populates="rehearsal",
-        lazy="selectin",
         cascade="delete, delete-orphan"
     )
 
@@ -33,6 +58,6 @@ class RehearsalParticipant(Base):
     )
     rehearsal_id: Mapped[int] = mapped_column(ForeignKey("lz_rehearsals.id"))
     rehearsal: Mapped["Rehearsal"] = relationship(
-        back_populates="rehearsal_participants", lazy="selectin"
+        back_populates="rehearsal_participants"
     )
     surname: Mapped[str] = mapped_column()
\ No newline at end of file
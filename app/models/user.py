@@ -4,7 +4,7 @@ from typing import Optional, List
 
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import relationship
-from sqlalchemy import ForeignKey, Table, Column, func
+from sqlalchemy import ForeignKey, Table, Column, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
 from app.models.post import Post, PostComment
@@ -16,6 +16,7 @@ user_roles_table = Table(
     Base.metadata,
     Column("role_id", ForeignKey("lz_roles.id"), primary_key=True),
     Column("user_id", ForeignKey("lz_users.id"), primary_key=True),
+    Index("ix_lz_user_roles_user_id_role_id", "user_id", "role_id"),
 )
 
 
@@ -31,6 +32,10 @@ permission_in_role_table = Table(
 
 class User(Base):
     __tablename__ = "lz_users"
+    __table_args__ = (
+        Index("ix_lz_users_created_on_id", "created_on", "id"),
+        Index("ix_lz_users_full_name_id", "full_name", "id"),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, index=True
@@ -41,6 +46,15 @@ class User(Base):
     hashed_password: Mapped[str]
     penalty_points: Mapped[int] = mapped_column(default=0)
     is_superadmin: Mapped[bool] = mapped_column(default=False)
+    # bumped whenever the effective permission set changes,
+    # invalidating permission claims baked into access tokens
+    permissions_version: Mapped[int] = mapped_column(
+        default=0, server_default="0"
+    )
+    # bumped on password change or reset, revoking issued feed tokens
+    feed_token_version: Mapped[int] = mapped_column(
+        default=0, server_default="0"
+    )
     created_on: Mapped[datetime.datetime] = mapped_column(
         nullable=False, default=func.CURRENT_TIMESTAMP()
     )
@@ -49,29 +63,31 @@ class User(Base):
     )
 
     sessions: Mapped[list["UserSession"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="delete, delete-orphan"
+        back_populates="user", cascade="delete, delete-orphan"
     )
     blocks: Mapped[list["UserBlock"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="delete, delete-orphan"
+        back_populates="user", cascade="delete, delete-orphan"
     )
     user_roles: Mapped[List["Role"]] = relationship(
         secondary=user_roles_table,
         back_populates="users_with_role",
-        lazy="selectin",
     )
     rehearsals: Mapped[list["Rehearsal"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="delete, delete-orphan"
+        back_populates="user", cascade="delete, delete-orphan"
     )
     posts: Mapped[list["Post"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="delete, delete-orphan"
+        back_populates="user", cascade="delete, delete-orphan"
     )
     comments: Mapped[list["PostComment"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="delete, delete-orphan"
+        back_populates="user", cascade="delete, delete-orphan"
     )
 
 
 class UserSession(Base):
     __tablename__ = "lz_sessions"
+    __table_args__ = (
+        Index("ix_lz_sessions_user_id_created_on", "user_id", "created_on"),
+    )
 
     uuid = Column(
         UUID(as_uuid=True),
@@ -81,10 +97,10 @@ class UserSession(Base):
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("lz_users.id"))
     user: Mapped["User"] = relationship(
-        back_populates="sessions", lazy="selectin"
+        back_populates="sessions"
     )
     created_on: Mapped[datetime.datetime] = mapped_column(
-        nullable=False, default=func.CURRENT_TIMESTAMP()
+        nullable=False, default=func.CURRENT_TIMESTAMP(), index=True
     )
     is_active: Mapped[bool] = mapped_column(default=True)
 
@@ -100,7 +116,7 @@ class UserBlock(Base):
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("lz_users.id"))
     user: Mapped["User"] = relationship(
-        back_populates="blocks", lazy="selectin"
+        back_populates="blocks"
     )
     banned_on: Mapped[datetime.datetime] = mapped_column(
         nullable=False, default=func.CURRENT_TIMESTAMP()
@@ -113,6 +129,7 @@ class UserBlock(Base):
 
 class Role(Base):
     __tablename__ = "lz_roles"
+    __table_args__ = (Index("ix_lz_roles_name_id", "name", "id"),)
 
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, index=True
@@ -123,7 +140,6 @@ class Role(Base):
     role_permissions: Mapped[List["Permission"]] = relationship(
         secondary=permission_in_role_table,
         back_populates="permission_roles",
-        lazy="selectin",
     )
 
     users_with_role: Mapped[List["User"]] = relationship(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Token(BaseModel):
@@ -14,5 +14,23 @@ class RefreshToken(BaseModel):
     refresh_token: str
 
 
+class FeedToken(BaseModel):
+    feed_token: str
+
+
 class TokenData(BaseModel):
     username: str | None = None
+    user_id: int | None = None
+    is_superadmin: bool = False
+    permissions: frozenset[str] = frozenset()
+    permissions_version: int | None = None
+
+
+class Principal(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    username: str
+    is_superadmin: bool
+    permissions: frozenset[str]
+    permissions_version: int
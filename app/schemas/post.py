@@ -12,6 +12,17 @@ class PostReadSimple(BaseModel):
     likes: int
     dislikes: int
     created_on: datetime
+    comment_count: int
+
+
+class PostSearchHit(BaseModel):
+    id: int
+    user_id: int
+    title: str
+    # HTML-escaped fragments of the text, matches wrapped in <b></b>
+    snippet: str
+    created_on: datetime
+    rank: float
 
 
 class PostCreate(BaseModel):
@@ -30,13 +41,8 @@ class PostComment(BaseModel):
 class PostCommentCreate(BaseModel):
     text: str
 
-class PostRead(BaseModel):
-    id: int
-    user_id: int
-    user: User
-    title: str
-    text: str
-    likes: int
-    dislikes: int
-    created_on: datetime
-    post_comments: list[PostComment]
+class PostRead(PostReadSimple):
+    # the first page of comments, the rest via /posts/{id}/comments
+    comments: list[PostComment]
+    comments_next_cursor: str | None = None
+
@@ -11,14 +11,26 @@ class RehearsalParticipant(BaseModel):
 class RehearsalCreate(BaseModel):
     participants: list[str]
     start_time: datetime
-    duration: int
+    # hours
+    duration: int = Field(gt=0, le=24)
     band_name: str
 
 
+class RehearsalSeriesCreate(RehearsalCreate):
+    """Weekly series: `occurrences` bookings, `every_weeks` apart."""
+    every_weeks: int = Field(default=1, ge=1, le=52)
+    occurrences: int = Field(ge=1, le=52)
+
+
 class RehearsalRead(BaseModel):
     id: int
     user_id: int
     rehearsal_participants: list[RehearsalParticipant]
     band_name: str
     start_time: datetime
-    duration: int
\ No newline at end of file
+    duration: int
+
+
+class FreeInterval(BaseModel):
+    start_time: datetime
+    end_time: datetime
@@ -1,15 +1,31 @@
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from jose import jwt
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from app.config import get_settings
+from app.schemas.auth import Principal
+from app.utils.cache import TTLCache
 
 settings = get_settings()
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# sha256(token) -> verified payload, expires together with the token
+jwt_cache = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE,
+    ttl=settings.REFRESH_TOKEN_EXPIRES_IN * 60,
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,14 +35,125 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def decode_jwt(token: str) -> dict:
-    return jwt.decode(token, settings.JWT_PRIVATE_KEY, algorithms=["HS256"])
+class PasswordHasher:
+    """
+    Runs bcrypt in a thread or process pool so that hashing never
+    blocks the event loop. At most `concurrency` operations are handed
+    to the pool at once, the rest wait on a semaphore.
+    """
+
+    def __init__(self, executor_type: str, workers: int, concurrency: int):
+        self.executor_type = executor_type
+        self.workers = workers
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.completed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore.locked():
+            self.waiting += 1
+            if self.waiting > self.max_waiting:
+                # a new high-water mark, the pool is the bottleneck
+                self.max_waiting = self.waiting
+                logger.info("password hasher saturated: %s", self.stats())
+            else:
+                logger.debug("password hasher queue depth: %d", self.waiting)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            verify_password, plain_password, hashed_password
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "waiting": self.waiting,
+            "running": self.running,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        logger.info("password hasher stats: %s", self.stats())
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_CONCURRENCY,
+)
+
+
+def decode_jwt(token: str, verify_exp: bool = True) -> dict:
+    token_digest = hashlib.sha256(token.encode()).digest()
+    payload = jwt_cache.get(token_digest)
+    if payload is None:
+        payload = jwt.decode(
+            token,
+            settings.JWT_PRIVATE_KEY,
+            algorithms=["HS256"],
+            options={"verify_exp": verify_exp},
+        )
+        ttl = None
+        if "exp" in payload:
+            ttl = payload["exp"] - time.time()
+        if ttl is None or ttl > 0:
+            jwt_cache.set(token_digest, payload, ttl)
+    return payload.copy()
 
 
 def create_token(
-    data: dict, type: str, expires_delta: timedelta | None = None
+    data: dict,
+    type: str,
+    expires_delta: timedelta | None = None,
+    principal: Principal | None = None,
 ):
     to_encode = data.copy()
+    if principal is not None:
+        # permission claims, trusted for as long as "pv" matches
+        # the permissions version stored for the user
+        to_encode.update(
+            {
+                "uid": principal.id,
+                "su": principal.is_superadmin,
+                "perms": sorted(principal.permissions),
+                "pv": principal.permissions_version,
+            }
+        )
     if expires_delta:
         expire = () + expires_delta
     else:
@@ -38,9 +165,13 @@ def create_token(
             expire = datetime.now(timezone.utc) + timedelta(
                 minutes=settings.REFRESH_TOKEN_EXPIRES_IN
             )
+        elif type == "feed":
+            expire = datetime.now(timezone.utc) + timedelta(
+                minutes=settings.FEED_TOKEN_EXPIRES_IN
+            )
         else:
             raise Exception(f"could not create '{type}' token")
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": type})
     to_encode.update({"iat": datetime.now(timezone.utc)})
     encoded_jwt = jwt.encode(
         to_encode, settings.JWT_PRIVATE_KEY, algorithm="HS256"
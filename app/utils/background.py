@@ -0,0 +1,41 @@
+import asyncio
+import contextlib
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Calls `func` every `interval` seconds on the event loop until
+    stopped. Errors are logged and do not stop the loop.
+    """
+
+    def __init__(
+        self, func: Callable[[], Awaitable], interval: float, name: str
+    ):
+        self.func = func
+        self.interval = interval
+        self.name = name
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("periodic task '%s' failed", self.name)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.crud.rehearsal import get_feed_marker, stream_rehearsal_feed
+from app.database import sessionmanager
+
+settings = get_settings()
+
+ICAL_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+
+def ical_text(value: str) -> str:
+    return (
+        value.replace("\r\n", "\n")
+        .replace("\r", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def ical_time(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def ical_line(line: str) -> bytes:
+    """Encode a content line, folded at 75 octets as RFC 5545 asks."""
+    raw = line.encode()
+    folded = []
+    while len(raw) > 75:
+        cut = 75 if not folded else 74
+        # never split a multibyte character
+        while raw[cut] & 0xC0 == 0x80:
+            cut -= 1
+        folded.append(raw[:cut])
+        raw = raw[cut:]
+    folded.append(raw)
+    return b"\r\n ".join(folded) + b"\r\n"
+
+
+def ical_event(row) -> bytes:
+    start_time = row["start_time"]
+    end_time = start_time + timedelta(hours=row["duration"])
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:rehearsal-{row['id']}@lz-app",
+        # rehearsals are never edited, so their creation time is the
+        # stamp and the feed stays byte-identical for its ETag
+        f"DTSTAMP:{ical_time(row['created_on'])}",
+        f"DTSTART:{ical_time(start_time)}",
+        f"DTEND:{ical_time(end_time)}",
+        f"SUMMARY:{ical_text(row['band_name'])}",
+    ]
+    if row["participants"]:
+        lines.append(f"DESCRIPTION:{ical_text(row['participants'])}")
+    lines.append("END:VEVENT")
+    return b"".join(ical_line(line) for line in lines)
+
+
+async def ical_calendar(name: str, rows: AsyncIterator) -> AsyncIterator[bytes]:
+    yield b"".join(
+        ical_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//LZ//Booking App//RU",
+            "CALSCALE:GREGORIAN",
+            f"X-WR-CALNAME:{ical_text(name)}",
+        )
+    )
+    async for row in rows:
+        yield ical_event(row)
+    yield ical_line("END:VCALENDAR")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def _feed_rows(user_id: int | None, since: datetime):
+    # the request session is closed before the body is sent,
+    # so the stream holds a session of its own
+    async with sessionmanager.session() as db_session:
+        async for row in stream_rehearsal_feed(db_session, user_id, since):
+            yield row
+
+
+async def rehearsal_feed_response(
+    request: Request,
+    db_session: AsyncSession,
+    name: str,
+    user_id: int | None = None,
+) -> Response:
+    """
+    Stream rehearsals of `user_id`, or of the whole room, as an
+    iCalendar feed. Polls with a matching If-None-Match get 304
+    without reading any rehearsal rows.
+    """
+    since = datetime.now(timezone.utc) - timedelta(
+        days=settings.CALENDAR_FEED_PAST_DAYS
+    )
+    count, max_id = await get_feed_marker(db_session, user_id, since)
+    etag = f'"{count}-{max_id or 0}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        ical_calendar(name, _feed_rows(user_id, since)),
+        media_type=ICAL_MEDIA_TYPE,
+        headers=headers,
+    )
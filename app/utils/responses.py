@@ -0,0 +1,18 @@
+from fastapi import Response
+from app.crud.pagination import Page
+
+
+def page_response(response: Response, page: Page):
+    """Set pagination headers and return the page body."""
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+        if page.total_estimated:
+            response.headers["X-Total-Count-Estimated"] = "true"
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if isinstance(page.items, bytes):
+        # fast path, already serialized
+        return Response(
+            page.items, media_type="application/json", headers=response.headers
+        )
+    return page.items
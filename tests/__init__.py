@@ -0,0 +1,16 @@
+import os
+
+# app.config reads these at import time; unit tests never connect
+for name, value in {
+    "API_STR": "/api",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "JWT_PRIVATE_KEY": "test",
+    "REFRESH_TOKEN_EXPIRES_IN": "60",
+    "ACCESS_TOKEN_EXPIRES_IN": "15",
+    "FRONTEND_ORIGIN": "http://localhost",
+}.items():
+    os.environ.setdefault(name, value)
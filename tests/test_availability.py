@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import Range
+from app.crud.rehearsal import _free_intervals
+
+HOUR = timedelta(hours=1)
+DAY_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def at(hours: float) -> datetime:
+    return DAY_START + timedelta(hours=hours)
+
+
+def busy(*ranges: tuple[float, float]) -> list[Range[datetime]]:
+    return [Range(at(lower), at(upper)) for lower, upper in ranges]
+
+
+class FreeIntervalsTest(unittest.TestCase):
+    def test_nothing_booked(self):
+        self.assertEqual(
+            _free_intervals([], at(0), at(24), HOUR), [(at(0), at(24))]
+        )
+
+    def test_gaps_between_bookings(self):
+        self.assertEqual(
+            _free_intervals(busy((10, 12), (14, 16)), at(8), at(20), HOUR),
+            [(at(8), at(10)), (at(12), at(14)), (at(16), at(20))],
+        )
+
+    def test_adjacent_bookings_leave_no_gap(self):
+        self.assertEqual(
+            _free_intervals(busy((10, 12), (12, 14)), at(10), at(16), HOUR),
+            [(at(14), at(16))],
+        )
+
+    def test_overlapping_busy_ranges(self):
+        # a booking inside an earlier, longer one frees nothing
+        self.assertEqual(
+            _free_intervals(busy((10, 16), (12, 14)), at(8), at(20), HOUR),
+            [(at(8), at(10)), (at(16), at(20))],
+        )
+
+    def test_booking_straddling_range_from(self):
+        self.assertEqual(
+            _free_intervals(busy((6, 10)), at(8), at(12), HOUR),
+            [(at(10), at(12))],
+        )
+
+    def test_booking_straddling_range_to(self):
+        self.assertEqual(
+            _free_intervals(busy((10, 14)), at(8), at(12), HOUR),
+            [(at(8), at(10))],
+        )
+
+    def test_fully_booked(self):
+        self.assertEqual(
+            _free_intervals(busy((6, 14)), at(8), at(12), HOUR), []
+        )
+
+    def test_gaps_narrowed_to_whole_slots(self):
+        self.assertEqual(
+            _free_intervals(
+                busy((9.5, 10.25), (13.75, 15)), at(8), at(16), HOUR
+            ),
+            [(at(8), at(9)), (at(11), at(13)), (at(15), at(16))],
+        )
+
+    def test_slots_counted_from_range_from(self):
+        self.assertEqual(
+            _free_intervals([], at(8.5), at(11), HOUR),
+            [(at(8.5), at(10.5))],
+        )
+
+    def test_gap_shorter_than_a_slot_is_dropped(self):
+        self.assertEqual(
+            _free_intervals(
+                busy((9, 10.25), (10.75, 12)), at(9), at(12), HOUR
+            ),
+            [],
+        )
@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime, timezone
+
+from app.utils.ical import ical_event, ical_line, ical_text
+
+
+class IcalTextTest(unittest.TestCase):
+    def test_escapes_separators(self):
+        self.assertEqual(ical_text("a;b,c\\d"), "a\\;b\\,c\\\\d")
+
+    def test_line_breaks_become_escaped_newlines(self):
+        for value in ("a\nb", "a\r\nb", "a\rb"):
+            self.assertEqual(ical_text(value), "a\\nb")
+
+
+class IcalLineTest(unittest.TestCase):
+    def test_short_line_is_not_folded(self):
+        self.assertEqual(ical_line("SUMMARY:x"), b"SUMMARY:x\r\n")
+
+    def test_folds_at_75_octets(self):
+        line = "DESCRIPTION:" + "x" * 200
+        folded = ical_line(line)
+        parts = folded[:-2].split(b"\r\n ")
+        self.assertEqual(len(parts[0]), 75)
+        self.assertTrue(all(len(part) <= 74 for part in parts[1:]))
+        self.assertEqual(b"".join(parts).decode(), line)
+
+    def test_never_splits_a_multibyte_character(self):
+        line = "SUMMARY:" + "я" * 100
+        parts = ical_line(line)[:-2].split(b"\r\n ")
+        for part in parts:
+            part.decode()
+        self.assertEqual(b"".join(parts).decode(), line)
+
+
+class IcalEventTest(unittest.TestCase):
+    def test_stamp_is_creation_time(self):
+        row = {
+            "id": 7,
+            "band_name": "Band",
+            "start_time": datetime(2030, 5, 1, 18, tzinfo=timezone.utc),
+            "duration": 2,
+            "created_on": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "participants": "Ivanov, Petrov",
+        }
+        event = ical_event(row).decode()
+        self.assertIn("DTSTAMP:20240102T030405Z\r\n", event)
+        self.assertIn("DTSTART:20300501T180000Z\r\n", event)
+        self.assertIn("DTEND:20300501T200000Z\r\n", event)
+        self.assertIn("DESCRIPTION:Ivanov\\, Petrov\r\n", event)
@@ -0,0 +1,97 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from app.crud.pagination import (
+    Pagination,
+    _after,
+    decode_cursor,
+    encode_cursor,
+)
+from app.crud.sorting import compile_order
+from app.models import Post, User
+
+
+def sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        keys = compile_order(Post, "desc_created_on")
+        values = [datetime(2024, 1, 2, 3, 4, 5, 678, timezone.utc), 42]
+        cursor = encode_cursor(keys, values)
+        self.assertEqual(decode_cursor(keys, cursor), values)
+
+    def test_cursor_is_bound_to_its_ordering(self):
+        cursor = encode_cursor(compile_order(Post, "desc_likes"), [3, 1])
+        with self.assertRaises(HTTPException) as raised:
+            decode_cursor(compile_order(Post, "asc_likes"), cursor)
+        self.assertEqual(raised.exception.status_code, 422)
+
+    def test_rejects_garbage(self):
+        keys = compile_order(Post, None)
+        for cursor in ("!!!", "bm90IGpzb24", encode_cursor(keys, [1, 2])):
+            with self.assertRaises(HTTPException):
+                decode_cursor(keys, cursor)
+
+
+class AfterTest(unittest.TestCase):
+    def test_same_direction_uses_row_comparison(self):
+        keys = compile_order(Post, "desc_likes")
+        self.assertIn(
+            "(lz_posts.likes, lz_posts.id) < (", sql(_after(keys, [3, 7]))
+        )
+        keys = compile_order(Post, "asc_likes")
+        self.assertIn(
+            "(lz_posts.likes, lz_posts.id) > (", sql(_after(keys, [3, 7]))
+        )
+
+    def test_mixed_directions_expand_to_or_chain(self):
+        keys = compile_order(Post, "desc_likes,asc_created_on")
+        clause = sql(_after(keys, [3, datetime.now(timezone.utc), 7]))
+        self.assertEqual(clause.count(" OR "), 2)
+        self.assertIn("lz_posts.likes < ", clause)
+        self.assertIn("lz_posts.id > ", clause)
+
+
+class PaginationTest(unittest.TestCase):
+    keys = compile_order(User, None)
+
+    def rows(self, count: int) -> list:
+        return [SimpleNamespace(id=i) for i in range(1, count + 1)]
+
+    def test_short_page_has_no_cursor(self):
+        rows, cursor = Pagination(self.keys, limit=5).page(self.rows(3))
+        self.assertEqual(len(rows), 3)
+        self.assertIsNone(cursor)
+
+    def test_extra_row_is_trimmed_into_cursor(self):
+        rows, cursor = Pagination(self.keys, limit=2).page(self.rows(3))
+        self.assertEqual([r.id for r in rows], [1, 2])
+        self.assertEqual(decode_cursor(self.keys, cursor), [2])
+
+    def test_zero_limit(self):
+        rows, cursor = Pagination(self.keys, limit=0).page(self.rows(1))
+        self.assertEqual(rows, [])
+        self.assertIsNone(cursor)
+
+    def test_dict_rows(self):
+        rows, cursor = Pagination(self.keys, limit=1).page(
+            [{"id": 1}, {"id": 2}], dict.get
+        )
+        self.assertEqual(rows, [{"id": 1}])
+        self.assertEqual(decode_cursor(self.keys, cursor), [1])
+
+    def test_rejects_cursor_with_offset(self):
+        cursor = encode_cursor(self.keys, [1])
+        with self.assertRaises(HTTPException):
+            Pagination(self.keys, limit=1, offset=1, cursor=cursor)
+
+    def test_apply_fetches_one_extra_row(self):
+        select_stmt = Pagination(self.keys, limit=10).apply(
+            User.__table__.select()
+        )
+        self.assertEqual(select_stmt._limit, 11)
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+
+from app.crud.reactions import ReactionBuffer
+
+
+class RecordingSession:
+    """Stands in for AsyncSession: records statements, may fail."""
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+        self.executed = []
+        self.commits = 0
+        self.during_execute = None
+
+    async def execute(self, statement):
+        if self.during_execute is not None:
+            self.during_execute()
+        if self.error is not None:
+            raise self.error
+        self.executed.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+class ReactionBufferTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.buffer = ReactionBuffer()
+
+    def test_deltas_add_up(self):
+        self.buffer.add(1, {"likes": 1})
+        self.buffer.add(1, {"likes": 1, "dislikes": -1})
+        self.assertEqual(self.buffer.delta(1), {"likes": 2, "dislikes": -1})
+        self.assertEqual(self.buffer.delta(2), {"likes": 0, "dislikes": 0})
+
+    async def test_empty_flush_runs_no_query(self):
+        db_session = RecordingSession()
+        self.assertEqual(await self.buffer.flush(db_session), 0)
+        self.assertEqual((db_session.executed, db_session.commits), ([], 0))
+
+    async def test_flush_writes_one_statement(self):
+        self.buffer.add(1, {"likes": 1})
+        self.buffer.add(2, {"dislikes": 1})
+        db_session = RecordingSession()
+        self.assertEqual(await self.buffer.flush(db_session), 2)
+        self.assertEqual(len(db_session.executed), 1)
+        self.assertEqual(db_session.commits, 1)
+        self.assertEqual(self.buffer.delta(1), {"likes": 0, "dislikes": 0})
+
+    async def test_failed_flush_requeues_deltas(self):
+        self.buffer.add(1, {"likes": 2})
+        with self.assertRaises(ConnectionError):
+            await self.buffer.flush(RecordingSession(ConnectionError()))
+        self.assertEqual(self.buffer.delta(1), {"likes": 2, "dislikes": 0})
+        self.assertEqual(await self.buffer.flush(RecordingSession()), 1)
+        self.assertEqual(self.buffer.delta(1), {"likes": 0, "dislikes": 0})
+
+    async def test_cancelled_flush_requeues_deltas(self):
+        self.buffer.add(1, {"dislikes": 1})
+        with self.assertRaises(asyncio.CancelledError):
+            await self.buffer.flush(
+                RecordingSession(asyncio.CancelledError())
+            )
+        self.assertEqual(self.buffer.delta(1), {"likes": 0, "dislikes": 1})
+
+    async def test_deltas_in_flight_stay_visible(self):
+        self.buffer.add(1, {"likes": 1})
+        db_session = RecordingSession(ConnectionError())
+        seen = []
+
+        def react_during_flush():
+            self.buffer.add(1, {"likes": 1})
+            seen.append(self.buffer.delta(1))
+
+        db_session.during_execute = react_during_flush
+        with self.assertRaises(ConnectionError):
+            await self.buffer.flush(db_session)
+        self.assertEqual(seen, [{"likes": 2, "dislikes": 0}])
+        # the failed batch merges with what arrived meanwhile
+        self.assertEqual(self.buffer.delta(1), {"likes": 2, "dislikes": 0})
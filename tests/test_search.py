@@ -0,0 +1,26 @@
+import unittest
+
+from app.crud.post import _MATCH_START, _MATCH_STOP, _highlight_snippet
+
+
+def marked(word: str) -> str:
+    return f"{_MATCH_START}{word}{_MATCH_STOP}"
+
+
+class HighlightSnippetTest(unittest.TestCase):
+    def test_matches_wrapped_in_bold(self):
+        self.assertEqual(
+            _highlight_snippet(f"зал на {marked('ремонт')} до пятницы"),
+            "зал на <b>ремонт</b> до пятницы",
+        )
+
+    def test_text_is_escaped(self):
+        self.assertEqual(
+            _highlight_snippet(f"{marked('a')} <img src=x onerror=f()> & b"),
+            "<b>a</b> &lt;img src=x onerror=f()&gt; &amp; b",
+        )
+
+    def test_markup_in_a_match_is_escaped(self):
+        self.assertEqual(
+            _highlight_snippet(marked("<i>")), "<b>&lt;i&gt;</b>"
+        )
@@ -0,0 +1,41 @@
+import unittest
+
+from fastapi import HTTPException
+from app.crud.sorting import compile_order
+from app.models import Post, User
+
+
+class CompileOrderTest(unittest.TestCase):
+    def test_default_gets_primary_key_tiebreaker(self):
+        keys = compile_order(Post, None, default="desc_created_on")
+        self.assertEqual(
+            [(k.name, k.descending) for k in keys],
+            [("created_on", True), ("id", True)],
+        )
+
+    def test_tiebreaker_follows_last_key_direction(self):
+        keys = compile_order(Post, "desc_likes,asc_created_on")
+        self.assertEqual(
+            [(k.name, k.descending) for k in keys],
+            [("likes", True), ("created_on", False), ("id", False)],
+        )
+
+    def test_explicit_primary_key_is_not_repeated(self):
+        keys = compile_order(User, "desc_id")
+        self.assertEqual([(k.name, k.descending) for k in keys], [("id", True)])
+
+    def test_rejects_unknown_label(self):
+        with self.assertRaises(HTTPException) as raised:
+            compile_order(User, "asc_hashed_password")
+        self.assertEqual(raised.exception.status_code, 422)
+
+    def test_rejects_bad_prefix(self):
+        for order_list in ("likes", "up_likes"):
+            with self.assertRaises(HTTPException) as raised:
+                compile_order(Post, order_list)
+            self.assertEqual(raised.exception.status_code, 422)
+
+    def test_rejects_repeated_label(self):
+        with self.assertRaises(HTTPException) as raised:
+            compile_order(Post, "asc_likes,desc_likes")
+        self.assertEqual(raised.exception.status_code, 422)